@@ -0,0 +1,65 @@
+'''
+Decode time per works page for each installed JSON backend
+
+Uses a saved /works response if given, else a synthetic 1000 item page
+shaped like a Crossref works page.
+
+Usage::
+
+    python benchmarks/bench_json.py
+    python benchmarks/bench_json.py works-page.json
+'''
+import sys
+import json
+import timeit
+
+from habanero.decoder import backends, set_json_backend, loads
+
+def work(i):
+  return {
+    "DOI": "10.1234/example.%d" % i,
+    "title": ["A study of things, number %d" % i],
+    "type": "journal-article",
+    "publisher": "Example Publisher",
+    "container-title": ["Journal of Examples"],
+    "author": [ {"given": "Given%d" % j, "family": "Family%d" % j,
+      "affiliation": [{"name": "University %d" % j}]} for j in range(5) ],
+    "issued": {"date-parts": [[2000 + i % 20, 1 + i % 12, 1]]},
+    "indexed": {"date-parts": [[2020, 1, 1]], "date-time": "2020-01-01T00:00:00Z",
+      "timestamp": 1577836800000},
+    "reference-count": i % 50,
+    "is-referenced-by-count": i % 30,
+    "subject": ["Ecology", "Evolution"],
+    "link": [{"URL": "http://example.com/%d.pdf" % i,
+      "content-type": "application/pdf"}],
+    "reference": [ {"key": "ref%d" % j, "DOI": "10.1234/ref.%d" % j,
+      "unstructured": "Author, A. Some reference title. Journal %d." % j}
+      for j in range(20) ],
+  }
+
+def page(n = 1000):
+  return json.dumps({"status": "ok", "message-type": "work-list",
+    "message-version": "1.0.0", "message": {"facets": {},
+    "next-cursor": "AoJ/example", "total-results": 100000,
+    "items": [ work(i) for i in range(n) ], "items-per-page": n,
+    "query": {"start-index": 0, "search-terms": None}}}).encode('utf-8')
+
+def main(path = None, number = 20):
+  if path is None:
+    body = page()
+  else:
+    with open(path, 'rb') as f:
+      body = f.read()
+  print("page size: %.1f MB" % (len(body) / 1024.0 ** 2))
+  for name in backends:
+    try:
+      set_json_backend(name)
+    except ImportError:
+      print("%-9s not installed" % name)
+      continue
+    secs = min(timeit.repeat(lambda: loads(body), number = number, repeat = 3)) / number
+    print("%-9s %7.1f ms per page" % (name, secs * 1000))
+  set_json_backend('auto')
+
+if __name__ == "__main__":
+  main(*sys.argv[1:2])
@@ -0,0 +1,60 @@
+'''
+Memory per work, for works kept as decoded dicts and in a WorkStore
+
+Uses saved /works responses (JSON, or JSON Lines from works_harvest_jsonl)
+if given, else synthetic works shaped like Crossref works.
+
+Usage::
+
+    python benchmarks/bench_store.py
+    python benchmarks/bench_store.py 200000
+    python benchmarks/bench_store.py 0 works-0000.jsonl
+'''
+import sys
+import json
+import tracemalloc
+
+from habanero.decoder import loads
+from habanero.store import WorkStore
+from bench_json import work
+
+def synthetic(n):
+  for i in range(n):
+    x = work(i)
+    x["publisher"] = "Example Publisher %d" % (i % 500)
+    x["container-title"] = ["Journal of Examples %d" % (i % 5000)]
+    x["member"] = str(i % 500)
+    x["license"] = [{"URL": "http://creativecommons.org/licenses/by/4.0/",
+      "content-version": "vor", "delay-in-days": 0}]
+    yield json.dumps(x).encode('utf-8')
+
+def saved(paths):
+  for path in paths:
+    with open(path, 'rb') as f:
+      if path.endswith('.jsonl'):
+        for line in f:
+          yield line
+      else:
+        for x in loads(f.read())['message']['items']:
+          yield json.dumps(x).encode('utf-8')
+
+def measure(make, bodies):
+  tracemalloc.start()
+  before = tracemalloc.get_traced_memory()[0]
+  kept = make(bodies)
+  used = tracemalloc.get_traced_memory()[0] - before
+  tracemalloc.stop()
+  return used, kept
+
+def main(n = 100000, *paths):
+  n = int(n)
+  bodies = list(saved(paths)) if paths else list(synthetic(n))
+  n = len(bodies)
+  print("%d works" % n)
+  used, _ = measure(lambda b: [ loads(z) for z in b ], bodies)
+  print("dicts:     %7d bytes per work" % (used / n))
+  used, store = measure(lambda b: WorkStore(loads(z) for z in b), bodies)
+  print("WorkStore: %7d bytes per work (nbytes: %d)" % (used / n, store.nbytes() / n))
+
+if __name__ == "__main__":
+  main(*sys.argv[1:])
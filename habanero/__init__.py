@@ -46,7 +46,16 @@ __version__ = '0.2.6.1'
 __author__ = 'Scott Chamberlain'
 __license__ = 'MIT'
 
+import sys
 from .crossref import Crossref
+if sys.version_info >= (3, 5):
+  from .crossref import AsyncCrossref
 from .cn import content_negotiation, csl_styles
 from .counts import citation_count
+from .session import make_session
+from .cache import SQLiteCache, LRUCache, CNCache
+from .decoder import set_json_backend, get_json_backend
+from .response import Works
+from .tabular import ParquetWriter, write_parquet
+from .store import WorkStore
 from .exceptions import *
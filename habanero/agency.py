@@ -0,0 +1,70 @@
+import re
+import requests
+from collections import OrderedDict
+
+from .request import request
+from .habanero_utils import map_concurrent,map_as_completed
+from .exceptions import *
+
+def doi_prefix(doi):
+  '''
+  Prefix of a DOI, e.g. "10.1371" for "10.1371/journal.pone.0033693",
+  ignoring any "doi:" or https://doi.org/ in front
+  '''
+  doi = re.sub(r"(?i)^(doi:|https?://(dx\.)?doi\.org/)", "", str(doi).strip())
+  return doi.split("/")[0].lower()
+
+def group_by_prefix(ids):
+  '''
+  Ordered dict of prefix to the DOIs in `ids` with that prefix
+  '''
+  groups = OrderedDict()
+  for doi in ids:
+    groups.setdefault(doi_prefix(doi), []).append(doi)
+  return groups
+
+def prefix_agencies(url, ids, agencies = None, concurrency = None,
+  as_completed = False, **kwargs):
+  '''
+  Registration agency for each of `ids`, looking up each DOI prefix once
+
+  The agency of a DOI is set by its prefix, so DOIs are grouped by prefix
+  and one DOI per prefix is sent to `/works/{doi}/agency`, trying the next
+  DOI with that prefix if a request fails. Agencies are kept in `agencies`,
+  keyed by prefix.
+
+  :return: list of agency labels in the order of `ids`, or with
+      `as_completed`, a generator of `(doi, label)` tuples, yielded as each
+      prefix is resolved
+  '''
+  if ids.__class__.__name__ == "str":
+    ids = ids.split()
+  if ids.__class__.__name__ == "int":
+    ids = [ids]
+  groups = group_by_prefix(ids)
+
+  def resolve(prefix):
+    if agencies is not None:
+      label = agencies.get(prefix)
+      if label is not None:
+        return label
+    err = None
+    for doi in groups[prefix]:
+      try:
+        res = request(url, "/works/", [doi], agency = True, **kwargs)
+      except (RequestError, requests.exceptions.HTTPError) as e:
+        err = e
+        continue
+      label = res['message']['agency']['label']
+      if agencies is not None:
+        agencies.set(prefix, label)
+      return label
+    raise err
+
+  if as_completed:
+    return ( (doi, label) for prefix, label in
+      map_as_completed(resolve, list(groups.keys()), concurrency)
+      for doi in groups[prefix] )
+  labels = dict(zip(groups.keys(),
+    map_concurrent(resolve, list(groups.keys()), concurrency)))
+  return [ labels[doi_prefix(doi)] for doi in ids ]
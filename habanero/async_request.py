@@ -0,0 +1,193 @@
+import re
+import asyncio
+
+try:
+  import aiohttp
+except ImportError:
+  aiohttp = None
+
+from .habanero_utils import make_ua,build_payload
+from .cn_formats import *
+from .exceptions import *
+from .decoder import loads
+from .counts.counts import parse_count
+
+def make_async_session(pool_maxsize = 10, limit_per_host = 0, mailto = None,
+  api_key = None):
+  '''
+  Make a pooled `aiohttp.ClientSession`, sending the habanero User-Agent
+  (with `mailto`, if given) and the Crossref Plus token on every request
+
+  Must be called from within a running event loop.
+  '''
+  if aiohttp is None:
+    raise ImportError("async requests need aiohttp, install with `pip install aiohttp`")
+  conn = aiohttp.TCPConnector(limit = pool_maxsize, limit_per_host = limit_per_host)
+  return aiohttp.ClientSession(connector = conn, headers = make_ua(mailto, api_key))
+
+def async_headers(session, extra = None):
+  # sessions from make_async_session already carry the User-Agent
+  head = {} if 'User-Agent' in session.headers else make_ua()
+  head.update(extra or {})
+  return head
+
+def async_params(payload):
+  # aiohttp only takes str/int/float query values; match how requests encodes the rest
+  return dict((k, v if v.__class__ in (str, int, float) else str(v)) for k, v in payload.items())
+
+async def fetch_json(session, url, payload):
+  async with session.get(url, params = async_params(payload),
+    headers = async_headers(session)) as r:
+    ctype = r.headers.get('Content-Type', '')
+    text = await r.text()
+    if r.status >= 400:
+      if re.search('json', ctype) is not None:
+        raise RequestError(r.status, loads(text)['message'][0]['message'])
+      r.raise_for_status()
+    if re.match("application/json", ctype) is None:
+      scode = r.status
+      if text == "Not implemented.":
+        scode = 400
+      raise RequestError(scode, text)
+    return loads(text)
+
+async def gather_limited(fun, ids, concurrency = None):
+  '''
+  Await `fun` for each of `ids`, at most `concurrency` at a time, results in input order
+  '''
+  sem = asyncio.Semaphore(concurrency or len(ids) or 1)
+  async def run(id):
+    async with sem:
+      return await fun(id)
+  return await asyncio.gather(*[ run(id) for id in ids ])
+
+async def async_request(url, path, ids = None, query = None, filter = None,
+        offset = None, limit = None, sample = None, sort = None,
+        order = None, facet = None, works = None,
+        cursor = None, cursor_max = None, agency = False, session = None,
+        concurrency = None, select = None, **kwargs):
+
+  url = url + path
+
+  if cursor_max.__class__.__name__ != 'NoneType':
+    if cursor_max.__class__ != int:
+      raise ValueError("cursor_max must be of class int")
+
+  if select.__class__.__name__ != 'NoneType':
+    if ids.__class__.__name__ != 'NoneType' and not works:
+      raise ValueError("select can only be used when searching works, not with ids")
+
+  payload = build_payload(query, filter, offset, limit, sample, sort,
+    order, facet, cursor, kwargs, select)
+
+  if(ids.__class__.__name__ == 'NoneType'):
+    return await fetch_json(session, url.strip("/"), payload)
+
+  if(ids.__class__.__name__ == "str"):
+    ids = ids.split()
+  if(ids.__class__.__name__ == "int"):
+    ids = [ids]
+
+  async def fetch(id):
+    if works:
+      return await AsyncRequest(url, str(id) + "/works",
+        query, filter, offset, limit, sample, sort,
+        order, facet, cursor, cursor_max, session = session,
+        select = select, **kwargs).do_request()
+    if agency:
+      endpt = url + str(id) + "/agency"
+    else:
+      endpt = url + str(id)
+    return await fetch_json(session, endpt.strip("/"), payload)
+
+  coll = await gather_limited(fetch, ids, concurrency)
+  if len(coll) == 1:
+    coll = coll[0]
+  return coll
+
+class AsyncRequest(object):
+  '''
+  Habanero: async request class
+
+  Async counterpart of :class:`~habanero.request_class.Request`
+  '''
+  def __init__(self, url, path, query = None, filter = None,
+        offset = None, limit = None, sample = None, sort = None,
+        order = None, facet = None, cursor = None, cursor_max = None,
+        agency = False, session = None, select = None, **kwargs):
+    self.url = url
+    self.path = path
+    self.query = query
+    self.filter = filter
+    self.offset = offset
+    self.limit = limit
+    self.sample = sample
+    self.sort = sort
+    self.order = order
+    self.facet = facet
+    self.cursor = cursor
+    self.cursor_max = cursor_max
+    self.agency = agency
+    self.session = session
+    self.select = select
+    self.kwargs = kwargs
+
+  def _url(self):
+    tmpurl = self.url + self.path
+    return tmpurl.strip("/")
+
+  async def do_request(self):
+    if self.cursor_max.__class__.__name__ != 'NoneType':
+      if self.cursor_max.__class__ != int:
+        raise ValueError("cursor_max must be of class int")
+
+    payload = build_payload(self.query, self.filter, self.offset,
+      self.limit, self.sample, self.sort, self.order, self.facet,
+      self.cursor, self.kwargs, self.select)
+
+    js = await fetch_json(self.session, self._url(), payload)
+    cu = js['message'].get('next-cursor')
+    max_avail = js['message']['total-results']
+    return await self._redo_req(js, payload, cu, max_avail)
+
+  async def _redo_req(self, js, payload, cu, max_avail):
+    if(cu.__class__.__name__ != 'NoneType' and self.cursor_max > len(js['message']['items'])):
+      res = [js]
+      total = len(js['message']['items'])
+      while(cu.__class__.__name__ != 'NoneType' and self.cursor_max > total and total < max_avail):
+        payload['cursor'] = cu
+        out = await fetch_json(self.session, self._url(), payload)
+        cu = out['message'].get('next-cursor')
+        res.append(out)
+        total += len(out['message']['items'])
+      return res
+    else:
+      return js
+
+async def async_cn_request(session, url, ids = None, format = None, style = None,
+        locale = None, concurrency = None):
+  if(ids.__class__.__name__ == "str"):
+    ids = ids.split()
+  if(ids.__class__.__name__ == "int"):
+    ids = [ids]
+
+  async def fetch(id):
+    type = cn_format_headers[format]
+    head = async_headers(session, {'Accept': type})
+    if format == "citeproc-json":
+      endpt = "http://api.crossref.org/works/" + id + "/" + type
+    else:
+      endpt = url + "/" + id
+    async with session.get(endpt, headers = head, allow_redirects = True) as r:
+      return await r.text()
+
+  coll = await gather_limited(fetch, ids, concurrency)
+  if len(coll) == 1:
+    coll = coll[0]
+  return coll
+
+async def async_citation_count(session, doi, url, key):
+  args = {"id": "doi:" + doi, "pid": key, "noredirect": "true"}
+  async with session.get(url, params = args, headers = async_headers(session)) as r:
+    content = await r.read()
+  return parse_count(content, doi)
@@ -0,0 +1,95 @@
+import requests
+try:
+  from urllib.parse import quote_plus
+except ImportError:
+  from urllib import quote_plus
+
+from .request import request
+from .habanero_utils import map_concurrent
+from .selecthandler import select_handler
+from .exceptions import *
+
+def chunk_dois(dois, base_length, max_url_length = 4000, chunk_size = 100):
+  '''
+  Split DOIs into chunks whose `filter=doi:a,doi:b,...` query keeps the
+  URL under `max_url_length` characters, with at most `chunk_size` DOIs each
+  '''
+  chunks = []
+  chunk = []
+  length = base_length
+  for doi in dois:
+    # doi: prefix, the encoded DOI, and an encoded comma
+    n = len(quote_plus('doi:' + doi)) + 3
+    if chunk and (length + n > max_url_length or len(chunk) >= chunk_size):
+      chunks.append(chunk)
+      chunk = []
+      length = base_length
+    chunk.append(doi)
+    length += n
+  if chunk:
+    chunks.append(chunk)
+  return chunks
+
+def works_batch(url, ids, chunk_size = 100, max_url_length = 4000,
+  concurrency = None, select = None, session = None, cache = None,
+  mailto = None, api_key = None, **kwargs):
+  '''
+  Look up many DOIs with few requests, packing each chunk of DOIs into
+  one /works request filtered on `doi:a,doi:b,...`
+
+  :return: dict, with `items`, one work (or None, if not found) per input
+      DOI, in the order of `ids`, and `not_found`, the DOIs not found
+  '''
+  if ids.__class__.__name__ == "str":
+    ids = ids.split()
+  wanted = []
+  seen = set()
+  single = []
+  for doi in ids:
+    key = doi.lower()
+    if key in seen:
+      continue
+    seen.add(key)
+    # a comma in a DOI would split the filter, so look these up one by one
+    if ',' in doi:
+      single.append(doi)
+    else:
+      wanted.append(doi)
+
+  base_length = len(url) + len("/works?rows=1000&filter=")
+  if mailto is not None:
+    base_length += len("&mailto=") + len(quote_plus(mailto))
+  if select is not None:
+    # results are matched to the input by DOI, so it's always selected
+    select = select_handler(select)
+    if 'DOI' not in select.split(','):
+      select = 'DOI,' + select
+    base_length += len("&select=") + len(quote_plus(select))
+  chunks = chunk_dois(wanted, base_length, max_url_length, chunk_size)
+
+  def fetch(chunk):
+    res = request(url, "/works/", None, None, {'doi': chunk}, None,
+      len(chunk), session = session, cache = cache, mailto = mailto,
+      api_key = api_key, select = select, **kwargs)
+    return res['message']['items']
+
+  def fetch_single(doi):
+    try:
+      res = request(url, "/works/", [doi], session = session, cache = cache,
+        mailto = mailto, api_key = api_key, **kwargs)
+    except requests.exceptions.HTTPError as e:
+      if e.response is not None and e.response.status_code == 404:
+        return []
+      raise
+    return [res['message']]
+
+  found = {}
+  pages = map_concurrent(fetch, chunks, concurrency)
+  pages += map_concurrent(fetch_single, single, concurrency)
+  for items in pages:
+    for item in items:
+      found[item.get('DOI', '').lower()] = item
+
+  items = [ found.get(doi.lower()) for doi in ids ]
+  not_found = [ doi for doi, item in zip(ids, items) if item is None ]
+  return {'items': items, 'not_found': not_found}
@@ -0,0 +1,416 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+try:
+  from urllib.parse import urlencode, urlparse
+except ImportError:
+  from urllib import urlencode
+  from urlparse import urlparse
+
+def cache_key(url, payload = None):
+  '''
+  Canonical cache key for a request: the URL plus sorted query parameters,
+  with the comma separated parts of `filter` sorted too, so that the same
+  filters given in a different order share a key
+  '''
+  params = dict(payload or {})
+  if 'filter' in params:
+    params['filter'] = ','.join(sorted(str(params['filter']).split(',')))
+  params = sorted((k, str(v)) for k, v in params.items())
+  key = url.rstrip("/")
+  if params:
+    key += '?' + urlencode(params)
+  return key
+
+def route(url):
+  '''
+  Route of a Crossref API URL, e.g. "/works" for both /works and /works/{doi}
+  '''
+  parts = [ z for z in urlparse(url).path.split('/') if z ]
+  return '/' + parts[0] if parts else '/'
+
+def cacheable(payload):
+  # cursors are single use and samples are random, so never cache them
+  return not any([ k in (payload or {}) for k in ['cursor', 'sample'] ])
+
+class SQLiteCache(object):
+  '''
+  Habanero: on-disk response cache
+
+  Caches Crossref API response bodies in a single SQLite file, so repeated
+  requests skip the network, across processes and restarts.
+
+  Entries expire after a time to live that can differ by route. TTLs are
+  looked up by route plus "?query" for searches (e.g. "/works?query"),
+  then by route (e.g. "/types"), falling back to `ttl`. When the file
+  grows past `max_size` bytes of bodies, the least recently used entries
+  are evicted.
+
+  Expired entries are kept, with the ETag and Last-Modified headers they
+  came with, and revalidated with a conditional request, so an unchanged
+  record comes back as a bodyless 304 and its entry is renewed.
+
+  Usage::
+
+      from habanero import Crossref, SQLiteCache
+      cache = SQLiteCache("crossref-cache.sqlite")
+      cr = Crossref(cache = cache)
+      cr.works(ids = '10.1371/journal.pone.0033693')
+      # from cache this time
+      cr.works(ids = '10.1371/journal.pone.0033693')
+
+      # keep /members responses for a week, at most 1 GB of bodies
+      cache = SQLiteCache("crossref-cache.sqlite",
+        route_ttls = {"/members": 7 * 86400}, max_size = 1024 ** 3)
+  '''
+  default_route_ttls = {
+    '/types': 30 * 86400,
+    '/licenses': 30 * 86400,
+    '/works': 7 * 86400,
+    '/works?query': 3600,
+  }
+
+  def __init__(self, path = None, ttl = 86400, route_ttls = None,
+    max_size = 512 * 1024 ** 2):
+    if path is None:
+      path = os.path.join(os.path.expanduser("~"), ".cache", "habanero", "cache.sqlite")
+    folder = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(folder):
+      os.makedirs(folder)
+    self.path = path
+    self.ttl = ttl
+    self.route_ttls = dict(self.default_route_ttls, **(route_ttls or {}))
+    self.max_size = max_size
+    self._lock = threading.Lock()
+    self._db = sqlite3.connect(path, check_same_thread = False)
+    with self._db:
+      self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY, body BLOB, size INTEGER,
+        expires REAL, accessed REAL)""")
+      self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+      # validators, added to caches made by older versions
+      cols = [ z[1] for z in self._db.execute("PRAGMA table_info(responses)") ]
+      for col in ['etag', 'last_modified']:
+        if col not in cols:
+          self._db.execute("ALTER TABLE responses ADD COLUMN %s TEXT" % col)
+    # running total of body sizes, so saving doesn't sum the whole table
+    self._total = self._sum()
+
+  def __repr__(self):
+    return "< %s \nPATH: %s\n>" % (type(self).__name__, self.path)
+
+  def ttl_for(self, url, payload = None):
+    name = route(url)
+    if any([ k == 'query' or k.startswith('query.') for k in (payload or {}) ]):
+      if name + '?query' in self.route_ttls:
+        return self.route_ttls[name + '?query']
+    return self.route_ttls.get(name, self.ttl)
+
+  def get(self, url, payload = None):
+    '''
+    Cached response body, or None if missing or expired
+    '''
+    key = cache_key(url, payload)
+    now = time.time()
+    with self._lock:
+      row = self._db.execute("SELECT body, expires FROM responses WHERE key = ?",
+        (key,)).fetchone()
+      if row is None or row[1] < now:
+        return None
+      with self._db:
+        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+    return bytes(row[0])
+
+  def lookup(self, url, payload = None):
+    '''
+    Cached entry, even if expired, as a tuple of the response body, its
+    ETag and Last-Modified headers, and whether it is still fresh, or
+    None if missing. A fresh entry counts as used, for eviction.
+    '''
+    key = cache_key(url, payload)
+    now = time.time()
+    with self._lock:
+      row = self._db.execute("""SELECT body, etag, last_modified, expires
+        FROM responses WHERE key = ?""", (key,)).fetchone()
+      if row is None:
+        return None
+      fresh = row[3] >= now
+      if fresh:
+        with self._db:
+          self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+    return bytes(row[0]), row[1], row[2], fresh
+
+  def set(self, url, payload, body, etag = None, last_modified = None):
+    '''
+    Save a response body, with its validators for revalidation
+    '''
+    now = time.time()
+    key = cache_key(url, payload)
+    with self._lock:
+      old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+      with self._db:
+        self._db.execute("""INSERT OR REPLACE INTO responses
+          (key, body, size, expires, accessed, etag, last_modified)
+          VALUES (?, ?, ?, ?, ?, ?, ?)""",
+          (key, sqlite3.Binary(body), len(body),
+           now + self.ttl_for(url, payload), now, etag, last_modified))
+      self._total += len(body) - (old[0] if old else 0)
+      self._evict()
+
+  def renew(self, url, payload = None):
+    '''
+    Reset the time to live of an entry, e.g., after a 304 Not Modified
+    '''
+    now = time.time()
+    with self._lock:
+      with self._db:
+        self._db.execute("UPDATE responses SET expires = ?, accessed = ? WHERE key = ?",
+          (now + self.ttl_for(url, payload), now, cache_key(url, payload)))
+
+  def delete(self, url, payload = None):
+    '''
+    Remove one response from the cache
+    '''
+    key = cache_key(url, payload)
+    with self._lock:
+      old = self._db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+      with self._db:
+        self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+      if old:
+        self._total -= old[0]
+
+  def clear(self):
+    '''
+    Remove every response from the cache
+    '''
+    with self._lock:
+      with self._db:
+        self._db.execute("DELETE FROM responses")
+      self._total = 0
+
+  def size(self):
+    '''
+    Total size in bytes of cached bodies
+    '''
+    with self._lock:
+      return self._sum()
+
+  def _sum(self):
+    return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+  def _evict(self):
+    if self._total <= self.max_size:
+      return
+    # other processes may share the file, so get the exact total before evicting
+    total = self._total = self._sum()
+    if total <= self.max_size:
+      return
+    rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed")
+    drop = []
+    for key, size in rows:
+      if total <= self.max_size:
+        break
+      drop.append((key,))
+      total -= size
+    with self._db:
+      self._db.executemany("DELETE FROM responses WHERE key = ?", drop)
+    self._total = total
+
+class LRUCache(object):
+  '''
+  Habanero: in-memory LRU cache
+
+  A bounded, thread-safe, least recently used cache, with hit and miss
+  counts. Used by :class:`~habanero.Crossref` to memoize lookups by id
+  (works, members, funders, journals, prefixes, and agencies), keyed by
+  request URL.
+
+  Cached results are shared between callers, so don't modify them in place.
+  With `ttl` set, entries expire that many seconds after they are set.
+
+  Usage::
+
+      from habanero import Crossref, LRUCache
+      memo = LRUCache(maxsize = 10000)
+      cr = Crossref(memo = memo)
+      cr.works(ids = '10.1371/journal.pone.0033693')
+      cr.works(ids = '10.1371/journal.pone.0033693')
+      memo.info()
+      # forget one lookup, or everything
+      memo.invalidate("http://api.crossref.org/works/10.1371/journal.pone.0033693")
+      memo.clear()
+  '''
+  def __init__(self, maxsize = 1024, ttl = None):
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self.hits = 0
+    self.misses = 0
+    self._data = OrderedDict()
+    self._lock = threading.Lock()
+
+  def __repr__(self):
+    return "< %s \nSIZE: %s/%s\nHITS: %s\nMISSES: %s\n>" % (type(self).__name__,
+      len(self._data), self.maxsize, self.hits, self.misses)
+
+  def __len__(self):
+    return len(self._data)
+
+  def __contains__(self, key):
+    with self._lock:
+      return self._live(key)
+
+  def _live(self, key):
+    if key not in self._data:
+      return False
+    expires = self._data[key][1]
+    if expires is not None and expires < time.time():
+      del self._data[key]
+      return False
+    return True
+
+  def get(self, key, default = None):
+    '''
+    Cached value for `key`, or `default`, counting a hit or a miss
+    '''
+    with self._lock:
+      if not self._live(key):
+        self.misses += 1
+        return default
+      entry = self._data.pop(key)
+      self._data[key] = entry
+      self.hits += 1
+      return entry[0]
+
+  def set(self, key, value):
+    expires = None if self.ttl is None else time.time() + self.ttl
+    with self._lock:
+      self._data.pop(key, None)
+      self._data[key] = (value, expires)
+      while len(self._data) > self.maxsize:
+        self._data.popitem(last = False)
+
+  def invalidate(self, key):
+    '''
+    Remove one entry, returning True if it was cached
+    '''
+    with self._lock:
+      return self._data.pop(key, None) is not None
+
+  def clear(self):
+    '''
+    Remove every entry and reset the hit and miss counts
+    '''
+    with self._lock:
+      self._data.clear()
+      self.hits = 0
+      self.misses = 0
+
+  def info(self):
+    '''
+    Hits, misses, and current and maximum size, as a dict
+    '''
+    with self._lock:
+      return {'hits': self.hits, 'misses': self.misses,
+        'size': len(self._data), 'maxsize': self.maxsize}
+
+class CNCache(object):
+  '''
+  Habanero: content negotiation cache
+
+  Caches citations from :func:`~habanero.cn.content_negotiation`, keyed
+  by DOI, format, style and locale, in memory and, if `path` is given, in
+  a SQLite file, so the same citation is only fetched once. Style and
+  locale only matter for the "text" format, so they're left out of the
+  key for other formats.
+
+  Negative results (e.g., DOI not found, or a format not available for a
+  DOI) are cached too, for `negative_ttl` seconds, as a DOI may be
+  registered later. Other citations are kept for `ttl` seconds, or
+  forever if None.
+
+  Usage::
+
+      from habanero import cn, CNCache
+      cache = CNCache("cn-cache.sqlite")
+      cn.content_negotiation(ids = '10.1126/science.169.3946.635', cache = cache)
+      # from cache this time
+      cn.content_negotiation(ids = '10.1126/science.169.3946.635', cache = cache)
+      # in memory only
+      cache = CNCache(maxsize = 100000)
+  '''
+  negative_statuses = (404, 406, 410)
+
+  def __init__(self, path = None, maxsize = 10000, ttl = None, negative_ttl = 86400):
+    self.path = path
+    self.ttl = ttl
+    self.negative_ttl = negative_ttl
+    self.memory = LRUCache(maxsize = maxsize)
+    self._lock = threading.Lock()
+    self._db = None
+    if path is not None:
+      folder = os.path.dirname(os.path.abspath(path))
+      if not os.path.isdir(folder):
+        os.makedirs(folder)
+      self._db = sqlite3.connect(path, check_same_thread = False)
+      with self._db:
+        self._db.execute("""CREATE TABLE IF NOT EXISTS citations (
+          key TEXT PRIMARY KEY, status INTEGER, body TEXT, expires REAL)""")
+
+  def __repr__(self):
+    return "< %s \nPATH: %s\nMEMORY: %s/%s\n>" % (type(self).__name__, self.path,
+      len(self.memory), self.memory.maxsize)
+
+  @staticmethod
+  def key(doi, format, style = None, locale = None):
+    if format != "text":
+      style = locale = None
+    return '|'.join([str(doi).lower(), str(format), str(style), str(locale)])
+
+  def get(self, doi, format, style = None, locale = None):
+    '''
+    Cached `(status, body)` for a citation, or None if missing or expired
+    '''
+    key = self.key(doi, format, style, locale)
+    entry = self.memory.get(key)
+    if entry is not None and (entry[2] is None or entry[2] >= time.time()):
+      return entry[0], entry[1]
+    if self._db is None:
+      return None
+    with self._lock:
+      row = self._db.execute("SELECT status, body, expires FROM citations WHERE key = ?",
+        (key,)).fetchone()
+    if row is None or (row[2] is not None and row[2] < time.time()):
+      return None
+    self.memory.set(key, row)
+    return row[0], row[1]
+
+  def set(self, doi, format, style, locale, status, body):
+    '''
+    Save a citation, or a negative result. Other errors (e.g., 5xx) aren't saved
+    '''
+    if status in self.negative_statuses:
+      ttl = self.negative_ttl
+    elif 200 <= status < 300:
+      ttl = self.ttl
+    else:
+      return
+    expires = None if ttl is None else time.time() + ttl
+    key = self.key(doi, format, style, locale)
+    self.memory.set(key, (status, body, expires))
+    if self._db is not None:
+      with self._lock:
+        with self._db:
+          self._db.execute("INSERT OR REPLACE INTO citations VALUES (?, ?, ?, ?)",
+            (key, status, body, expires))
+
+  def clear(self):
+    '''
+    Remove every citation from the cache
+    '''
+    self.memory.clear()
+    if self._db is not None:
+      with self._lock:
+        with self._db:
+          self._db.execute("DELETE FROM citations")
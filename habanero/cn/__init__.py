@@ -2,3 +2,4 @@
 
 from .cn import content_negotiation
 from .styles import csl_styles
+from .render import render_citations, sync_styles
@@ -2,7 +2,8 @@ from ..cnrequest import CNRequest
 from .constants import *
 
 def content_negotiation(ids = None, format = "bibtex", style = 'apa',
-    locale = "en-US", **kwargs):
+    locale = "en-US", session = None, mailto = None, concurrency = None,
+    as_completed = False, file = None, cache = None, api_key = None, **kwargs):
     '''
     Get citations in various formats from CrossRef
 
@@ -15,10 +16,30 @@ def content_negotiation(ids = None, format = "bibtex", style = 'apa',
         for options. Default: "apa". If there's a style that CrossRef doesn't support
         you'll get a `(500) Internal Server Error`
     :param locale: [str] Language locale. See `locale.locale_alias`
+    :param session: [requests.Session] Session to make requests with, e.g., from
+        :func:`~habanero.make_session`. Default: a shared pooled session
+    :param mailto: [str] Your email address, sent in the User-Agent header so
+        Crossref can contact you about problems
+    :param concurrency: [int] Number of DOIs to request in parallel. Size the
+        session's connection pool to match. Default: None (one at a time)
+    :param as_completed: [bool] If true, return a generator yielding `(doi, body)`
+        tuples as each request finishes. Default: false
+    :param file: [str] A path (or an open text file) to write each body to as it
+        arrives, in the order of `ids`, separated by blank lines, e.g., to make one
+        .bib or .ris file without holding every citation in memory. DOIs that fail
+        (e.g., not found) are left out of the file, and listed in the result. Default: None
+    :param cache: [CNCache] Cache of citations, keyed by DOI, format, style and
+        locale, so each is only fetched once, see :class:`~habanero.CNCache`.
+        Default: None (no caching)
+    :param api_key: [str] Crossref Plus API token, sent in the Crossref-Plus-API-Token
+        header (citeproc-json is fetched from the Crossref API). Default: None
     :param kwargs: any additional arguments will be passed on to `requests.get`
 
     :return: string, which can be parsed to various formats depending on what
-        format you request (e.g., JSON vs. XML vs. bibtex)
+        format you request (e.g., JSON vs. XML vs. bibtex). A list of strings if many
+        DOIs passed in. With `as_completed`, a generator of `(doi, string)` tuples.
+        With `file`, a dict with the number of citations `written`, and a list of the
+        DOIs that `failed`
 
     Usage::
 
@@ -64,5 +85,17 @@ def content_negotiation(ids = None, format = "bibtex", style = 'apa',
         # many DOIs
         dois = ['10.5167/UZH-30455','10.5167/UZH-49216','10.5167/UZH-503', '10.5167/UZH-38402','10.5167/UZH-41217']
         x = cn.content_negotiation(ids = dois)
+        # 4 at a time
+        x = cn.content_negotiation(ids = dois, concurrency = 4)
+        # handle each as it arrives
+        for doi, bib in cn.content_negotiation(ids = dois, concurrency = 4, as_completed = True):
+            print(doi, len(bib))
+        # write straight to one file
+        cn.content_negotiation(ids = dois, format = "ris", concurrency = 4, file = "refs.ris")
+        # cache citations, in memory and on disk
+        from habanero import CNCache
+        cache = CNCache("cn-cache.sqlite")
+        cn.content_negotiation(ids = dois, cache = cache)
     '''
-    return CNRequest(cn_base_url, ids, format, style, locale, **kwargs)
+    return CNRequest(cn_base_url, ids, format, style, locale, session, mailto,
+        concurrency, as_completed, file, cache, api_key, **kwargs)
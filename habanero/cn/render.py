@@ -0,0 +1,166 @@
+import os
+import threading
+import warnings
+
+try:
+  from citeproc import CitationStylesStyle, CitationStylesBibliography, Citation, CitationItem, formatter
+  from citeproc.source.json import CiteProcJSON
+except ImportError:
+  CitationStylesStyle = None
+
+from ..cnrequest import CNRequest
+from ..habanero_utils import map_concurrent,replace_file
+from ..session import default_session
+from ..decoder import loads
+from .constants import cn_base_url
+from .styles import csl_styles
+
+styles_url = "https://raw.githubusercontent.com/citation-style-language/styles/master/"
+
+def default_style_dir():
+  return os.path.join(os.path.expanduser("~"), ".cache", "habanero", "styles")
+
+def sync_styles(styles = None, style_dir = None, overwrite = False,
+  concurrency = None, session = None, **kwargs):
+  '''
+  Download CSL styles to a local directory, for :func:`~habanero.cn.render_citations`
+
+  :param styles: [list] Style names, e.g., ["apa", "harvard3"]. Default: every
+      style listed by :func:`~habanero.cn.csl_styles`
+  :param style_dir: [str] Directory to save styles to. Default: ~/.cache/habanero/styles
+  :param overwrite: [bool] Download styles already in `style_dir` again. Default: false
+  :param concurrency: [int] Number of styles to download in parallel. Default: None
+      (one at a time)
+  :param session: [requests.Session] Session to make requests with. Default: a
+      shared pooled session
+  :param kwargs: any additional arguments will be passed on to `requests.get`
+
+  :return: list, of the styles downloaded
+
+  Usage::
+
+      from habanero import cn
+      cn.sync_styles(["apa", "harvard3", "nature"])
+      # every style
+      cn.sync_styles(concurrency = 8)
+  '''
+  if session is None:
+    session = default_session()
+  if style_dir is None:
+    style_dir = default_style_dir()
+  if not os.path.isdir(style_dir):
+    os.makedirs(style_dir)
+  if styles is None:
+    styles = csl_styles(session = session, **kwargs)
+  if styles.__class__.__name__ == 'str':
+    styles = [styles]
+  if not overwrite:
+    styles = [ z for z in styles if not os.path.exists(os.path.join(style_dir, z + ".csl")) ]
+
+  def fetch(name):
+    res = session.get(styles_url + name + ".csl", **kwargs)
+    res.raise_for_status()
+    path = os.path.join(style_dir, name + ".csl")
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+      f.write(res.content)
+    replace_file(tmp, path)
+    return name
+
+  return map_concurrent(fetch, styles, concurrency)
+
+_styles = {}
+_styles_lock = threading.Lock()
+
+def load_style(style, locale, style_dir = None):
+  '''
+  Parsed CSL style, from `style_dir` if there, else bundled with citeproc-py,
+  kept in memory so each style and locale is only parsed once, or again
+  when the file changes (e.g., with :func:`~habanero.cn.sync_styles`)
+  '''
+  if CitationStylesStyle is None:
+    raise ImportError("rendering citations needs citeproc-py, install with `pip install citeproc-py`")
+  path = os.path.join(style_dir or default_style_dir(), style + ".csl")
+  mtime = os.path.getmtime(path) if os.path.exists(path) else None
+  key = (path, locale)
+  with _styles_lock:
+    if key not in _styles or _styles[key][0] != mtime:
+      _styles[key] = (mtime, CitationStylesStyle(path if mtime is not None else style,
+        locale = locale, validate = False))
+    return _styles[key][1]
+
+def render(item, style):
+  '''
+  Render one citeproc-json record (a dict) as plain text with a parsed style
+  '''
+  key = str(item.get('DOI') or item.get('id') or 'item').lower()
+  with warnings.catch_warnings():
+    # Crossref records have fields citeproc-py doesn't know, e.g. "reference"
+    warnings.simplefilter("ignore")
+    source = CiteProcJSON([dict(item, id = key)])
+    bib = CitationStylesBibliography(style, source, formatter.plain)
+    bib.register(Citation([CitationItem(key)]))
+    return str(bib.bibliography()[0])
+
+def render_citations(ids, styles = "apa", locale = "en-US", style_dir = None,
+  session = None, cache = None, concurrency = None, mailto = None, api_key = None,
+  **kwargs):
+  '''
+  Render citations locally, in any number of CSL styles
+
+  Fetches citeproc-json once per DOI (see :func:`~habanero.cn.content_negotiation`),
+  then renders each style with citeproc-py, instead of a request per DOI and
+  style. Styles are read from `style_dir`, see :func:`~habanero.cn.sync_styles`,
+  or else from the styles bundled with citeproc-py. Requires `citeproc-py`.
+
+  :param ids: [str] A DOI, or a list of DOIs
+  :param styles: [str] A CSL style name, or a list of them. Default: "apa"
+  :param locale: [str] Language locale. Default: "en-US"
+  :param style_dir: [str] Directory of .csl files. Default: ~/.cache/habanero/styles
+  :param session: [requests.Session] Session to make requests with. Default: a
+      shared pooled session
+  :param cache: [CNCache] Cache for the citeproc-json, see :class:`~habanero.CNCache`.
+      Default: None (no caching)
+  :param concurrency: [int] Number of DOIs to request in parallel. Default: None
+      (one at a time)
+  :param mailto: [str] Your email address, sent in the User-Agent header
+  :param api_key: [str] Crossref Plus API token, sent in the Crossref-Plus-API-Token header
+  :param kwargs: any additional arguments will be passed on to `requests.get`
+
+  :return: For one style, a list of citations (strings) in the order of `ids`, or
+      a string for one DOI. For a list of styles, a dict of style name to those.
+      Citations are None for DOIs whose citeproc-json couldn't be fetched
+
+  Usage::
+
+      from habanero import cn
+      cn.sync_styles(["apa", "harvard3", "nature"])
+      cn.render_citations('10.1126/science.169.3946.635')
+      dois = ['10.1126/science.169.3946.635', '10.1371/journal.pone.0033693']
+      res = cn.render_citations(dois, styles = ["apa", "harvard3", "nature"])
+      res["nature"]
+  '''
+  single = ids.__class__.__name__ == 'str' and len(ids.split()) == 1
+  if ids.__class__.__name__ == 'str':
+    ids = ids.split()
+  bodies = CNRequest(cn_base_url, list(ids), "citeproc-json", None, None,
+    session, mailto, concurrency, cache = cache, api_key = api_key, **kwargs)
+  if len(ids) == 1:
+    bodies = [bodies]
+  items = []
+  for body in bodies:
+    try:
+      items.append(loads(body))
+    except ValueError:
+      items.append(None)
+
+  names = [styles] if styles.__class__.__name__ == 'str' else styles
+  out = {}
+  for name in names:
+    style = load_style(name, locale, style_dir)
+    out[name] = [ None if z is None else render(z, style) for z in items ]
+    if single:
+      out[name] = out[name][0]
+  if styles.__class__.__name__ == 'str':
+    return out[styles]
+  return out
@@ -1,13 +1,48 @@
 import requests
 import json
+import os
 import re
+import time
 
-from ..habanero_utils import check_json
+from ..habanero_utils import check_json,replace_file
+from ..session import default_session
+from ..decoder import loads
 
-def csl_styles(**kwargs):
+def default_snapshot_path():
+  return os.path.join(os.path.expanduser("~"), ".cache", "habanero", "csl-styles.json")
+
+def read_snapshot(path):
+  try:
+    with open(path, "rb") as f:
+      return loads(f.read())
+  except (IOError, OSError, ValueError):
+    return None
+
+def write_snapshot(path, snap):
+  folder = os.path.dirname(os.path.abspath(path))
+  if not os.path.isdir(folder):
+    os.makedirs(folder)
+  tmp = path + ".tmp"
+  with open(tmp, "w") as f:
+    json.dump(snap, f)
+  replace_file(tmp, path)
+
+def csl_styles(session = None, path = None, max_age = 86400, **kwargs):
   '''
   Get list of styles from https://github.com/citation-style-language/styles
 
+  The list is saved to a local snapshot, with the styles repository commit
+  it came from. Within `max_age` seconds of the last check the snapshot is
+  used as is. After that, it's revalidated with a conditional request for the
+  latest commit, and the full list only downloaded again when the commit has
+  changed. If GitHub can't be reached (or rate limits the request) the
+  snapshot is used.
+
+  :param session: [requests.Session] Session to make requests with. Default: a
+      shared pooled session
+  :param path: [str] Path of the snapshot file. Default: ~/.cache/habanero/csl-styles.json
+  :param max_age: [int] Seconds before the snapshot is revalidated. Use 0 to always
+      revalidate. Default: 86400 (a day)
   :param kwargs: any additional arguments will be passed on to `requests.get`
 
   :return: list, of CSL styles
@@ -16,18 +51,47 @@ def csl_styles(**kwargs):
 
       from habanero import cn
       cn.csl_styles()
+      # check for new styles on every call
+      cn.csl_styles(max_age = 0)
   '''
+  if session is None:
+    session = default_session()
+  if path is None:
+    path = default_snapshot_path()
+  snap = read_snapshot(path)
+  if snap is not None and time.time() - snap.get('checked', 0) < max_age:
+    return snap['styles']
+
+  try:
+    snap = fetch_styles(session, snap, **kwargs)
+  except requests.exceptions.RequestException:
+    if snap is None:
+      raise
+    return snap['styles']
+  write_snapshot(path, snap)
+  return snap['styles']
+
+def fetch_styles(session, snap = None, **kwargs):
   base = "https://api.github.com/repos/citation-style-language/styles"
-  tt = requests.get(base + '/commits?per_page=1', **kwargs)
+  head = {}
+  if snap is not None and snap.get('etag') is not None:
+    head['If-None-Match'] = snap['etag']
+  tt = session.get(base + '/commits?per_page=1', headers = head, **kwargs)
+  if tt.status_code == 304:
+    return dict(snap, checked = time.time())
   tt.raise_for_status()
   check_json(tt)
-  commres = tt.json()
+  commres = loads(tt.content)
   sha = commres[0]['sha']
-  sty = requests.get(base + "/git/trees/" + sha, **kwargs)
+  etag = tt.headers.get('ETag')
+  if snap is not None and snap.get('sha') == sha:
+    return dict(snap, etag = etag, checked = time.time())
+  sty = session.get(base + "/git/trees/" + sha, **kwargs)
   sty.raise_for_status()
   check_json(sty)
-  res = sty.json()
+  res = loads(sty.content)
   files = [ z['path'] for z in res['tree'] ]
   matches = [ re.search(".csl", g) for g in files ]
   csls = [ x.string for x in filter(None, matches) ]
-  return [ re.sub(".csl", "", x) for x in csls ]
+  styles = [ re.sub(".csl", "", x) for x in csls ]
+  return {'sha': sha, 'etag': etag, 'checked': time.time(), 'styles': styles}
@@ -1,40 +1,95 @@
+import io
 import requests
 import json
 
-from .habanero_utils import switch_classes,make_ua
+from .habanero_utils import switch_classes,make_ua,map_concurrent,map_as_completed,imap_concurrent
 from .cn_formats import *
+from .session import default_session
 
 def CNRequest(url, ids = None, format = None, style = None,
-        locale = None, **kwargs):
+        locale = None, session = None, mailto = None, concurrency = None,
+        as_completed = False, file = None, cache = None, api_key = None, **kwargs):
+
+  if session is None:
+    session = default_session()
 
   if(ids.__class__.__name__ == "str"):
     ids = ids.split()
   if(ids.__class__.__name__ == "int"):
     ids = [ids]
 
+  def fetch(id):
+    return make_request(url, id, format, style, locale, session, mailto,
+      cache, api_key, **kwargs)
+
+  if file is not None:
+    def fetch_status(id):
+      return fetch_response(url, id, format, style, locale, session, mailto,
+        cache, api_key, **kwargs)
+    return write_bodies(file, ids, imap_concurrent(fetch_status, ids, concurrency))
+
+  if as_completed:
+    return map_as_completed(fetch, ids, concurrency)
+
   if(len(ids) == 1):
-    return make_request(url, ids[0], format, style, locale, **kwargs)
+    return fetch(ids[0])
   else:
-    coll = []
-    for i in range(len(ids)):
-      tt = make_request(url, ids[i], format, style, locale, **kwargs)
-      coll.append(tt)
+    coll = map_concurrent(fetch, ids, concurrency)
 
     if len(coll) == 1:
       coll = coll[0]
     return coll
 
-def make_request(url, ids, format, style, locale, **kwargs):
+def write_bodies(file, ids, responses):
+  '''
+  Write each body from `(status, body)` responses to `file` (a path or a
+  file object) as it arrives, separated by blank lines. Error responses
+  aren't written, so the file only holds citations. Returns a dict with
+  the number `written` and the DOIs that `failed`.
+  '''
+  if file.__class__.__name__ in ('str', 'unicode'):
+    with io.open(file, "w", encoding = "utf-8") as f:
+      return write_bodies(f, ids, responses)
+  n = 0
+  failed = []
+  for id, (status, body) in zip(ids, responses):
+    if not 200 <= status < 300:
+      failed.append(id)
+      continue
+    if n > 0:
+      file.write(u"\n")
+    file.write(body)
+    if not body.endswith(u"\n"):
+      file.write(u"\n")
+    n += 1
+  return {'written': n, 'failed': failed}
+
+def make_request(url, ids, format, style, locale, session, mailto = None,
+  cache = None, api_key = None, **kwargs):
+  return fetch_response(url, ids, format, style, locale, session, mailto,
+    cache, api_key, **kwargs)[1]
+
+def fetch_response(url, ids, format, style, locale, session, mailto = None,
+  cache = None, api_key = None, **kwargs):
+  '''
+  Citation for one DOI, as a tuple of the HTTP status and body
+  '''
+  if cache is not None:
+    hit = cache.get(ids, format, style, locale)
+    if hit is not None:
+      return hit
+
   type = cn_format_headers[format]
   htype = {'Accept': type}
-  head = dict(make_ua(), **htype)
+  head = dict(make_ua(mailto, api_key), **htype)
 
   if format == "citeproc-json":
     url = "http://api.crossref.org/works/" + ids + "/" + type
-    return requests.get(url, headers = head, allow_redirects = True, **kwargs).text
   else:
     if format == "text":
       type = type + "; style = " + style + "; locale = " + locale
     url = url + "/" + ids
-    return requests.get(url, headers = head, allow_redirects = True, **kwargs).text
-
+  r = session.get(url, headers = head, allow_redirects = True, **kwargs)
+  if cache is not None:
+    cache.set(ids, format, style, locale, r.status_code, r.text)
+  return r.status_code, r.text
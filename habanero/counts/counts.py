@@ -1,30 +1,84 @@
 import requests
-from xml.dom import minidom
-from ..habanero_utils import make_ua
+from io import BytesIO
+from xml.etree.ElementTree import iterparse, ParseError
+from ..habanero_utils import make_ua,map_concurrent
+from ..session import default_session
+from ..exceptions import *
 
 def citation_count(doi, url = "http://www.crossref.org/openurl/",
-    key = "cboettig@ropensci.org", **kwargs):
+    key = "cboettig@ropensci.org", session = None, mailto = None,
+    concurrency = None, api_key = None, **kwargs):
     '''
     Get a citation count with a DOI
 
-    :@param doi: [String] DOI, digital object identifier
+    :@param doi: [String|Array] DOI, digital object identifier, or a list of DOIs
     :@param url: [String] the API url for the function (should be left to default)
     :@param keyc [String] your API key
+    :@param session: [requests.Session] Session to make requests with. Default: a
+        shared pooled session
+    :@param mailto: [String] Your email address, sent in the User-Agent header
+    :@param concurrency: [Fixnum] Number of DOIs to request in parallel, when a list
+        of DOIs is given. Size the session's connection pool to match. Default: None
+        (one at a time)
+    :@param api_key: [String] Crossref Plus API token, sent in the Crossref-Plus-API-Token header
 
     See http://labs.crossref.org/openurl/ for more info on this Crossref API service.
 
+    :return: the citation count (an int) for one DOI. For a list of DOIs, a dict
+        with `counts`, a dict of DOI to citation count, and `errors`, a dict of
+        DOI to error message for DOIs that failed (e.g., not found), so that one
+        failure doesn't stop the rest
+
     Usage::
 
         from habanero import counts
         counts.citation_count(doi = "10.1371/journal.pone.0042793")
         counts.citation_count(doi = "10.1016/j.fbr.2012.01.001")
         # DOI not found
-        ## FIXME
         counts.citation_count(doi = "10.1016/j.fbr.2012")
+        # many DOIs, 4 at a time
+        res = counts.citation_count(doi = ["10.1371/journal.pone.0042793",
+          "10.1016/j.fbr.2012.01.001", "10.1016/j.fbr.2012"], concurrency = 4)
+        res['counts']
+        res['errors']
     '''
+    if session is None:
+        session = default_session()
+    if doi.__class__.__name__ in ('str', 'unicode'):
+        return fetch_count(doi, url, key, session, mailto, api_key, **kwargs)
+
+    def fetch(x):
+        try:
+            return x, fetch_count(x, url, key, session, mailto, api_key, **kwargs), None
+        except (RequestError, ParseError, requests.exceptions.RequestException) as e:
+            return x, None, str(e)
+
+    counts = {}
+    errors = {}
+    for x, count, err in map_concurrent(fetch, list(doi), concurrency):
+        if err is None:
+            counts[x] = count
+        else:
+            errors[x] = err
+    return {'counts': counts, 'errors': errors}
+
+def fetch_count(doi, url, key, session, mailto = None, api_key = None, **kwargs):
     args = {"id": "doi:" + doi, "pid": key, "noredirect": True}
     args = dict((k, v) for k, v in args.items() if v)
-    res = requests.get(url, params = args, headers = make_ua(), **kwargs)
-    xmldoc = minidom.parseString(res.content)
-    val = xmldoc.getElementsByTagName('query')[0].attributes['fl_count'].value
-    return int(str(val))
+    res = session.get(url, params = args, headers = make_ua(mailto, api_key), **kwargs)
+    res.raise_for_status()
+    return parse_count(res.content, doi)
+
+def parse_count(content, doi = None):
+    '''
+    Citation count from an OpenURL response, reading only as far as the
+    first <query> element, whose fl_count attribute holds the count
+    '''
+    for event, elem in iterparse(BytesIO(content), events = ('start',)):
+        if elem.tag == 'query' or elem.tag.endswith('}query'):
+            val = elem.get('fl_count')
+            if val is None:
+                raise RequestError(404, "no citation count for DOI %s (status: %s)" %
+                    (doi, elem.get('status')))
+            return int(val)
+    raise RequestError(404, "no citation count for DOI %s" % doi)
@@ -1,3 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import sys
 from .crossref import Crossref
+if sys.version_info >= (3, 5):
+  from .async_crossref import AsyncCrossref
@@ -0,0 +1,198 @@
+from ..async_request import async_request,AsyncRequest,make_async_session,async_cn_request,async_citation_count
+from ..habanero_utils import sub_str,check_kwargs
+from ..cn.constants import cn_base_url
+
+class AsyncCrossref(object):
+    '''
+    AsyncCrossref: asyncio client for the Crossref search API
+
+    Has the same methods as :class:`~habanero.Crossref`, but each one is a
+    coroutine, so it can be awaited from an event loop without tying up a
+    thread per request. Requires `aiohttp`.
+
+    Requests share one pooled `aiohttp.ClientSession`, opened on first use.
+    Close it when done, or use the client as an async context manager.
+
+    Usage::
+
+        import asyncio
+        from habanero import AsyncCrossref
+
+        async def main():
+            async with AsyncCrossref() as cr:
+                res = await cr.works(ids = '10.1371/journal.pone.0033693')
+                many = await cr.works(ids = ['10.1038/srep16696', '10.1002/jor.1100150407'])
+                bib = await cr.content_negotiation(ids = '10.1126/science.169.3946.635')
+            return res, many, bib
+
+        asyncio.run(main())
+    '''
+    def __init__(self, base_url = "http://api.crossref.org", api_key = None,
+                 session = None, pool_maxsize = 10, limit_per_host = 0,
+                 mailto = None):
+
+        self.base_url = base_url
+        self.api_key = api_key
+        self.mailto = mailto
+        self.pool_maxsize = pool_maxsize
+        self.limit_per_host = limit_per_host
+        self._session = session
+
+    def __repr__(self):
+      return """< %s \nURL: %s\nKEY: %s\n>""" % (type(self).__name__,
+        self.base_url, sub_str(self.api_key))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    @property
+    def session(self):
+        if self._session is None:
+            self._session = make_async_session(self.pool_maxsize,
+                self.limit_per_host, self.mailto, self.api_key)
+        return self._session
+
+    async def close(self):
+        '''
+        Close the underlying HTTP session
+        '''
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def works(self, ids = None, query = None, filter = None, offset = None,
+              limit = None, sample = None, sort = None,
+              order = None, facet = None, cursor = None,
+              cursor_max = 5000, concurrency = None, **kwargs):
+        '''
+        Search Crossref works, see :func:`~habanero.Crossref.works`
+
+        :param concurrency: [Fixnum] Maximum number of ids requested at once.
+            Default: None (all at once, bounded by the connection pool)
+        '''
+        if ids.__class__.__name__ != 'NoneType':
+            return await async_request(self.base_url, "/works/", ids,
+                query, filter, offset, limit, sample, sort,
+                order, facet, None, None, None, session = self.session,
+                concurrency = concurrency, **kwargs)
+        else:
+            return await AsyncRequest(self.base_url, "/works/",
+              query, filter, offset, limit, sample, sort,
+              order, facet, cursor, cursor_max, session = self.session, **kwargs).do_request()
+
+    async def members(self, ids = None, query = None, filter = None, offset = None,
+              limit = None, sample = None, sort = None,
+              order = None, facet = None, works = False,
+              cursor = None, cursor_max = 5000, concurrency = None, **kwargs):
+        '''
+        Search Crossref members, see :func:`~habanero.Crossref.members`
+        '''
+        return await async_request(self.base_url, "/members/", ids,
+            query, filter, offset, limit, sample, sort,
+            order, facet, works, cursor, cursor_max, session = self.session,
+            concurrency = concurrency, **kwargs)
+
+    async def prefixes(self, ids = None, filter = None, offset = None,
+              limit = None, sample = None, sort = None,
+              order = None, facet = None, works = False,
+              cursor = None, cursor_max = 5000, concurrency = None, **kwargs):
+        '''
+        Search Crossref prefixes, see :func:`~habanero.Crossref.prefixes`
+        '''
+        check_kwargs(["query"], kwargs)
+        return await async_request(self.base_url, "/prefixes/", ids,
+          query = None, filter = filter, offset = offset, limit = limit,
+          sample = sample, sort = sort, order = order, facet = facet, works = works,
+          cursor = cursor, cursor_max = cursor_max, session = self.session,
+          concurrency = concurrency, **kwargs)
+
+    async def funders(self, ids = None, query = None, filter = None, offset = None,
+              limit = None, sample = None, sort = None,
+              order = None, facet = None, works = False,
+              cursor = None, cursor_max = 5000, concurrency = None, **kwargs):
+        '''
+        Search Crossref funders, see :func:`~habanero.Crossref.funders`
+        '''
+        return await async_request(self.base_url, "/funders/", ids,
+          query, filter, offset, limit, sample, sort,
+          order, facet, works, cursor, cursor_max, session = self.session,
+          concurrency = concurrency, **kwargs)
+
+    async def journals(self, ids = None, query = None, filter = None, offset = None,
+              limit = None, sample = None, sort = None,
+              order = None, facet = None, works = False,
+              cursor = None, cursor_max = 5000, concurrency = None, **kwargs):
+        '''
+        Search Crossref journals, see :func:`~habanero.Crossref.journals`
+        '''
+        return await async_request(self.base_url, "/journals/", ids,
+          query, filter, offset, limit, sample, sort,
+          order, facet, works, cursor, cursor_max, session = self.session,
+          concurrency = concurrency, **kwargs)
+
+    async def types(self, ids = None, query = None, filter = None, offset = None,
+              limit = None, sample = None, sort = None,
+              order = None, facet = None, works = False,
+              cursor = None, cursor_max = 5000, concurrency = None, **kwargs):
+        '''
+        Search Crossref types, see :func:`~habanero.Crossref.types`
+        '''
+        return await async_request(self.base_url, "/types/", ids,
+            query, filter, offset, limit, sample, sort,
+            order, facet, works, cursor, cursor_max, session = self.session,
+            concurrency = concurrency, **kwargs)
+
+    async def licenses(self, query = None, offset = None,
+              limit = None, sample = None, sort = None,
+              order = None, facet = None, **kwargs):
+        '''
+        Search Crossref licenses, see :func:`~habanero.Crossref.licenses`
+        '''
+        check_kwargs(["ids", "filter", "works"], kwargs)
+        return await async_request(self.base_url, "/licenses/", None,
+            query, None, offset, limit, None, sort,
+            order, facet, None, None, None, None, session = self.session, **kwargs)
+
+    async def registration_agency(self, ids, concurrency = None, **kwargs):
+        '''
+        Determine registration agency for DOIs, see :func:`~habanero.Crossref.registration_agency`
+        '''
+        check_kwargs(["query", "filter", "offset", "limit", "sample", "sort",
+            "order", "facet", "works"], kwargs)
+        res = await async_request(self.base_url, "/works/", ids,
+            None, None, None, None, None, None,
+            None, None, None, None, None, True, session = self.session,
+            concurrency = concurrency, **kwargs)
+        if res.__class__ != list:
+            k = []
+            k.append(res)
+        else:
+            k = res
+        return [ z['message']['agency']['label'] for z in k ]
+
+    async def random_dois(self, sample = 10, **kwargs):
+        '''
+        Get a random set of DOIs, see :func:`~habanero.Crossref.random_dois`
+        '''
+        res = await async_request(self.base_url, "/works/", None,
+            None, None, None, None, sample, None,
+            None, None, True, session = self.session, **kwargs)
+        return [ z['DOI'] for z in res['message']['items'] ]
+
+    async def content_negotiation(self, ids = None, format = "bibtex", style = 'apa',
+        locale = "en-US", url = cn_base_url, concurrency = None):
+        '''
+        Get citations in various formats, see :func:`~habanero.cn.content_negotiation`
+        '''
+        return await async_cn_request(self.session, url, ids, format, style,
+            locale, concurrency)
+
+    async def citation_count(self, doi, url = "http://www.crossref.org/openurl/",
+        key = "cboettig@ropensci.org"):
+        '''
+        Get a citation count with a DOI, see :func:`~habanero.counts.citation_count`
+        '''
+        return await async_citation_count(self.session, doi, url, key)
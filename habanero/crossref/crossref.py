@@ -2,8 +2,14 @@ import sys
 import requests
 from ..request import request
 from ..request_class import Request
+from ..session import make_session
+from ..harvest import partition_filters,harvest_items,harvest_to_jsonl,sync_items
+from ..batch import works_batch
+from ..agency import prefix_agencies
+from ..cache import LRUCache
 from ..habanero_utils import sub_str,check_kwargs
 from .filters import filter_names, filter_details
+from ..selecthandler import work_fields
 
 class Crossref(object):
     '''
@@ -22,6 +28,12 @@ class Crossref(object):
     Also:
 
     * registration_agency - :func:`~habanero.Crossref.registration_agency`
+    * works_iter - :func:`~habanero.Crossref.works_iter`, and the same for
+      the works of a member, prefix, funder, journal or type
+    * works_harvest - :func:`~habanero.Crossref.works_harvest`
+    * works_harvest_jsonl - :func:`~habanero.Crossref.works_harvest_jsonl`
+    * works_sync - :func:`~habanero.Crossref.works_sync`
+    * works_batch - :func:`~habanero.Crossref.works_batch`
     * random_dois - :func:`~habanero.Crossref.random_dois`
 
     What am I actually searching when using the Crossref search API?:
@@ -40,14 +52,60 @@ class Crossref(object):
         cr = Crossref()
         # set a different base url
         Crossref(base_url = "http://some.other.url")
-        # set an api key
+        # set an api key (Crossref Plus), sent as the Plus token header
         Crossref(api_key = "123456")
-
+        # give your email, to use the "polite" pool of API servers
+        Crossref(mailto = "name@example.com")
+        # size the connection pool, e.g., for many concurrent requests
+        Crossref(pool_maxsize = 20)
+        # or pass in your own session
+        from habanero import make_session
+        Crossref(session = make_session(pool_maxsize = 20, pool_block = True))
+        # cache responses on disk
+        from habanero import SQLiteCache
+        Crossref(cache = SQLiteCache("crossref-cache.sqlite"))
+        # keep the most recent lookups by id in memory
+        from habanero import LRUCache
+        Crossref(memo = LRUCache(maxsize = 10000))
+        # keep registration agencies (by DOI prefix) for a day, not a week
+        Crossref(agency_cache = LRUCache(maxsize = 100000, ttl = 86400))
+        # return response objects, decoded only as far as they're used
+        cr = Crossref(lazy = True)
+        res = cr.works(query = "ecology", limit = 1000)
+        res.total_results()
+        [ z.doi for z in res.items() ]
+
+    With `lazy = True`, :func:`~habanero.Crossref.works` and the other route
+    methods return :class:`~habanero.response.LazyWorks` (or
+    :class:`~habanero.noworks.LazyNoWorks`) objects instead of dicts. The
+    response body is kept as is: the total and page size are read from it
+    without decoding, and works are decoded one at a time, as
+    :class:`~habanero.response.Work` records, as `items()` is iterated. Use
+    `result` for the whole decoded dict. Deep paging with `cursor` still
+    returns dicts (a list of them).
+
+    All requests made by a `Crossref` instance go through one pooled,
+    keep-alive `requests.Session` (see :func:`~habanero.make_session`),
+    so repeated requests reuse open connections.
     '''
-    def __init__(self, base_url = "http://api.crossref.org", api_key = None):
+    def __init__(self, base_url = "http://api.crossref.org", api_key = None,
+                 session = None, pool_connections = 10, pool_maxsize = 10,
+                 pool_block = False, cache = None, memo = None, mailto = None,
+                 agency_cache = None, lazy = False):
 
         self.base_url = base_url
         self.api_key = api_key
+        self.mailto = mailto
+        if session is None:
+            session = make_session(pool_connections = pool_connections,
+                pool_maxsize = pool_maxsize, pool_block = pool_block)
+        self.session = session
+        self.cache = cache
+        self.memo = memo
+        if agency_cache is None:
+            agency_cache = LRUCache(maxsize = 100000, ttl = 7 * 86400)
+        self.agency_cache = agency_cache
+        self.lazy = lazy
 
     def __repr__(self):
       return """< %s \nURL: %s\nKEY: %s\n>""" % (type(self).__name__,
@@ -56,7 +114,8 @@ class Crossref(object):
     def works(self, ids = None, query = None, filter = None, offset = None,
               limit = None, sample = None, sort = None,
               order = None, facet = None, cursor = None,
-              cursor_max = 5000, **kwargs):
+              cursor_max = 5000, concurrency = None,
+              as_completed = False, pipeline = False, select = None, **kwargs):
         '''
         Search Crossref works
 
@@ -84,6 +143,17 @@ class Crossref(object):
             deep paging can result in continuous requests until all are retrieved, use this
             parameter to set a maximum number of records. Of course, if there are less records
             found than this value, you will get only those found.
+        :param pipeline: [Boolean] Only used with a cursor. If true, download the next page
+            in a background thread while the current page is being decoded. Default: false
+        :param select: [Array] Fields to return for each work, e.g., ['DOI', 'title'], so
+            pages are smaller and faster to decode. Can't be used with ids. See
+            :func:`~habanero.Crossref.select_fields` for the fields. Default: None (all fields)
+        :param concurrency: [Fixnum] Number of ids to request in parallel. Only used
+            when many ids are passed in. Size the connection pool to match,
+            see :class:`~habanero.Crossref`. Default: None (one at a time)
+        :param as_completed: [Boolean] If true, and ids are passed in, return a generator
+            yielding `(id, result)` tuples as each request finishes, instead of a
+            list in the order of `ids`. Default: false
         :param kwargs: any additional arguments will be passed on to
             `requests.get`
 
@@ -97,6 +167,13 @@ class Crossref(object):
             cr.works(ids = '10.1371/journal.pone.0033693')
             dois = ['10.1371/journal.pone.0033693', ]
             cr.works(ids = dois)
+            # fetch many DOIs in parallel, results in the same order as dois
+            dois = ['10.1016/j.neurobiolaging.2010.03.024', '10.1002/jor.1100150407',
+              '10.1038/srep16696', '10.1109/icdcsw.2003.1203662']
+            cr.works(ids = dois, concurrency = 4)
+            # or handle each result as it arrives
+            for doi, res in cr.works(ids = dois, concurrency = 4, as_completed = True):
+                print(doi, res['message']['title'])
             x = cr.works(query = "ecology")
             x['status']
             x['message-type']
@@ -111,6 +188,10 @@ class Crossref(object):
             x = cr.works(filter = {'has_full_text': True})
             x
 
+            # only some fields of each work
+            x = cr.works(query = "ecology", select = ['DOI', 'title', 'issued'])
+            x['message']['items'][0].keys()
+
             # Parse output to various data pieces
             x = cr.works(filter = {'has_full_text': True})
             ## get doi for each item
@@ -155,16 +236,359 @@ class Crossref(object):
         if ids.__class__.__name__ != 'NoneType':
             return request(self.base_url, "/works/", ids,
                 query, filter, offset, limit, sample, sort,
-                order, facet, None, None, None, **kwargs)
+                order, facet, None, None, None, session = self.session,
+                cache = self.cache, memo = self.memo,
+                mailto = self.mailto, api_key = self.api_key,
+                concurrency = concurrency, as_completed = as_completed,
+                select = select, lazy = self.lazy, **kwargs)
         else:
             return Request(self.base_url, "/works/",
               query, filter, offset, limit, sample, sort,
-              order, facet, cursor, cursor_max, **kwargs).do_request()
+              order, facet, cursor, cursor_max, session = self.session,
+              cache = self.cache, mailto = self.mailto, api_key = self.api_key,
+              pipeline = pipeline, select = select, lazy = self.lazy,
+              **kwargs).do_request()
+
+    def works_iter(self, query = None, filter = None, limit = None, sort = None,
+                   order = None, facet = None, cursor = "*", cursor_max = 5000,
+                   items = True, pipeline = False, select = None, **kwargs):
+        '''
+        Iterate over Crossref works with deep paging
+
+        Like :func:`~habanero.Crossref.works` with a cursor, but returns a
+        generator that yields results as each page arrives, instead of
+        collecting every page first. Memory use stays at about one page,
+        however many records are harvested.
+
+        :param query: [String] A query string
+        :param filter: [Hash] Filter options. See ...
+        :param limit: [Fixnum] Number of results per page. Default: 20. Max: 1000
+        :param sort: [String] Field to sort on, see :func:`~habanero.Crossref.works`
+        :param order: [String] Sort order, one of 'asc' or 'desc'
+        :param facet: [Boolean] Include facet results. Default: false
+        :param cursor: [String] Cursor to start from. Default: "*"
+        :param cursor_max: [Fixnum] Max records to retrieve, same as in
+            :func:`~habanero.Crossref.works`. Pass None to get all records. Default: 5000
+        :param items: [Boolean] If true, yield each item (a dict per work). If false,
+            yield each page, as returned by :func:`~habanero.Crossref.works`. Default: true
+        :param pipeline: [Boolean] If true, download the next page in a background
+            thread while the current page is being decoded and consumed. Default: false
+        :param select: [Array] Fields to return for each work, see
+            :func:`~habanero.Crossref.works`. Default: None (all fields)
+        :param kwargs: any additional arguments will be passed on to
+            `requests.get`
+
+        :return: A generator
+
+        Usage::
+
+            from habanero import Crossref
+            cr = Crossref()
+            for x in cr.works_iter(query = "ecology", limit = 1000, cursor_max = 10000):
+                print(x['DOI'])
+
+            # pages instead of items
+            for page in cr.works_iter(query = "ecology", items = False):
+                print(len(page['message']['items']))
+
+            # overlap downloading the next page with processing this one
+            for x in cr.works_iter(query = "ecology", limit = 1000, pipeline = True):
+                print(x['DOI'])
+
+            # just the DOI and title of each work, for smaller pages
+            for x in cr.works_iter(query = "ecology", select = ['DOI', 'title']):
+                print(x['DOI'], x.get('title'))
+
+            # works of a member, journal, etc.
+            dois = [ x['DOI'] for x in cr.members_works_iter(98, cursor_max = 100) ]
+            dois = [ x['DOI'] for x in cr.journals_works_iter("2167-8359", cursor_max = 100) ]
+        '''
+        return self._works_iter("/works/", query, filter, limit, sort, order,
+            facet, cursor, cursor_max, items, pipeline, dict(kwargs, select = select))
+
+    def members_works_iter(self, id, query = None, filter = None, limit = None,
+                           sort = None, order = None, facet = None, cursor = "*",
+                           cursor_max = 5000, items = True, pipeline = False,
+                           **kwargs):
+        '''
+        Iterate over works of a Crossref member, see :func:`~habanero.Crossref.works_iter`
+
+        :param id: [String] A member id
+        '''
+        return self._works_iter("/members/" + str(id) + "/works", query, filter,
+            limit, sort, order, facet, cursor, cursor_max, items, pipeline, kwargs)
+
+    def prefixes_works_iter(self, id, filter = None, limit = None,
+                            sort = None, order = None, facet = None, cursor = "*",
+                            cursor_max = 5000, items = True, pipeline = False,
+                           **kwargs):
+        '''
+        Iterate over works of a DOI prefix, see :func:`~habanero.Crossref.works_iter`
+
+        :param id: [String] A DOI prefix
+        '''
+        check_kwargs(["query"], kwargs)
+        return self._works_iter("/prefixes/" + str(id) + "/works", None, filter,
+            limit, sort, order, facet, cursor, cursor_max, items, pipeline, kwargs)
+
+    def funders_works_iter(self, id, query = None, filter = None, limit = None,
+                           sort = None, order = None, facet = None, cursor = "*",
+                           cursor_max = 5000, items = True, pipeline = False,
+                           **kwargs):
+        '''
+        Iterate over works of a funder, see :func:`~habanero.Crossref.works_iter`
+
+        :param id: [String] A funder id
+        '''
+        return self._works_iter("/funders/" + str(id) + "/works", query, filter,
+            limit, sort, order, facet, cursor, cursor_max, items, pipeline, kwargs)
+
+    def journals_works_iter(self, id, query = None, filter = None, limit = None,
+                            sort = None, order = None, facet = None, cursor = "*",
+                            cursor_max = 5000, items = True, pipeline = False,
+                           **kwargs):
+        '''
+        Iterate over works of a journal, see :func:`~habanero.Crossref.works_iter`
+
+        :param id: [String] A journal ISSN
+        '''
+        return self._works_iter("/journals/" + str(id) + "/works", query, filter,
+            limit, sort, order, facet, cursor, cursor_max, items, pipeline, kwargs)
+
+    def types_works_iter(self, id, query = None, filter = None, limit = None,
+                         sort = None, order = None, facet = None, cursor = "*",
+                         cursor_max = 5000, items = True, pipeline = False,
+                           **kwargs):
+        '''
+        Iterate over works of a type, see :func:`~habanero.Crossref.works_iter`
+
+        :param id: [String] A type identifier, e.g., journal-article
+        '''
+        return self._works_iter("/types/" + str(id) + "/works", query, filter,
+            limit, sort, order, facet, cursor, cursor_max, items, pipeline, kwargs)
+
+    def _works_iter(self, path, query, filter, limit, sort, order, facet,
+                    cursor, cursor_max, items, pipeline, kwargs):
+        req = Request(self.base_url, path,
+            query, filter, None, limit, None, sort,
+            order, facet, cursor, cursor_max, session = self.session,
+            cache = self.cache, mailto = self.mailto, api_key = self.api_key,
+            pipeline = pipeline, **kwargs)
+        if items:
+            return req.iter_items()
+        else:
+            return req.iter_pages()
+
+    def works_harvest(self, query = None, filter = None, partitions = 4,
+                      partition_by = "index_date", limit = 1000, cursor_max = None,
+                      concurrency = None, **kwargs):
+        '''
+        Harvest a large works query with parallel cursors
+
+        A single cursor can only be followed one page at a time. This splits the
+        query into disjoint slices, and follows one cursor per slice in parallel,
+        yielding the merged works as they arrive.
+
+        Slices are made either by date, bisecting the date range of the
+        `from_`/`until_` filters for `partition_by` (open-ended if not given)
+        and sizing slices with `rows=0` requests, or from a list of prefixes or
+        member ids, one slice each. Works are deduplicated by DOI.
+
+        Note that when partitioning by `pub_date`, works without a published
+        date are not matched by any slice. Every work has an index date.
+
+        :param query: [String] A query string
+        :param filter: [Hash] Filter options. See :func:`~habanero.Crossref.works`
+        :param partitions: [Fixnum|Array] Number of slices for `index_date` and `pub_date`,
+            or a list of prefixes or member ids for `prefix` and `member`. Default: 4
+        :param partition_by: [String] One of `index_date` (default), `pub_date`, `prefix`,
+            or `member`
+        :param limit: [Fixnum] Number of results per page. Default: 1000
+        :param cursor_max: [Fixnum] Max records to retrieve overall. Default: None (all)
+        :param concurrency: [Fixnum] Number of slices harvested at once. Size the connection
+            pool to match, see :class:`~habanero.Crossref`. Default: one per slice
+        :param kwargs: any additional arguments will be passed on to
+            `requests.get`
+
+        :return: A generator of works (a dict per work)
+
+        Usage::
+
+            from habanero import Crossref
+            cr = Crossref(pool_maxsize = 8)
+            res = cr.works_harvest(filter = {'from_index_date': '2016-01-01',
+              'until_index_date': '2016-01-31'}, partitions = 8)
+            dois = [ x['DOI'] for x in res ]
+
+            # by publication date
+            res = cr.works_harvest(query = "ecology", partition_by = "pub_date",
+              filter = {'from_pub_date': '2010'}, partitions = 8, cursor_max = 20000)
+
+            # one slice per prefix
+            res = cr.works_harvest(partitions = ['10.1016', '10.1371'], partition_by = "prefix",
+              filter = {'type': 'journal-article'}, cursor_max = 5000)
+        '''
+        if cursor_max.__class__.__name__ != 'NoneType':
+            if cursor_max.__class__ != int:
+                raise ValueError("cursor_max must be of class int")
+        kwargs = dict(kwargs, mailto = self.mailto, api_key = self.api_key)
+        filters = partition_filters(self.base_url, query, filter, partitions,
+            partition_by, self.session, kwargs)
+        return harvest_items(self.base_url, query, filters, limit, cursor_max,
+            concurrency, self.session, kwargs)
+
+    def works_harvest_jsonl(self, out_dir, query = None, filter = None, partitions = 4,
+                            partition_by = "index_date", limit = 1000, concurrency = None,
+                            compress = False, max_records = None, **kwargs):
+        '''
+        Harvest a large works query to JSON Lines files, resumably
+
+        Like :func:`~habanero.Crossref.works_harvest`, but works are streamed
+        to files in `out_dir` instead of returned, one set of files per slice,
+        and each finished slice is recorded in `out_dir/checkpoint.json`
+        (with its count, files, and last DOI and index date), written atomically.
+
+        If the harvest is interrupted, run it again with the same arguments:
+        finished slices are skipped, and unfinished slices harvested again
+        from the start (cursors expire after a few minutes, so can't be
+        resumed). Unfinished files are only renamed into place when their
+        slice finishes, so finished files are always complete. Use more
+        partitions to lose less work to an interruption.
+
+        Unlike :func:`~habanero.Crossref.works_harvest`, duplicates aren't
+        removed: a work that moves between slices during the harvest (e.g., is
+        re-indexed) can be in the files of two slices. When loading the files,
+        keep one work per DOI, e.g., the one with the latest `indexed` date.
+
+        :param out_dir: [String] Directory for the files and the checkpoint
+        :param query: [String] A query string
+        :param filter: [Hash] Filter options. See :func:`~habanero.Crossref.works`
+        :param partitions: [Fixnum|Array] Slices, see :func:`~habanero.Crossref.works_harvest`.
+            Default: 4
+        :param partition_by: [String] One of `index_date` (default), `pub_date`, `prefix`,
+            or `member`
+        :param limit: [Fixnum] Number of results per page. Default: 1000
+        :param concurrency: [Fixnum] Number of slices harvested at once. Default: one per slice
+        :param compress: [Boolean] If true, gzip the files. Default: false
+        :param max_records: [Fixnum] Start a new file after this many works. Default:
+            None (one file per slice)
+        :param kwargs: any additional arguments will be passed on to
+            `requests.get`
+
+        :return: A dict, with the `count` of works, number of `slices`, and
+            the `files` written
+
+        Usage::
+
+            from habanero import Crossref
+            cr = Crossref(pool_maxsize = 8)
+            res = cr.works_harvest_jsonl("harvest", filter = {'from_index_date': '2016-01-01',
+              'until_index_date': '2016-12-31'}, partitions = 64, concurrency = 8,
+              compress = True, max_records = 100000)
+            res['count']
+            res['files'][0]
+        '''
+        kwargs = dict(kwargs, mailto = self.mailto, api_key = self.api_key)
+        return harvest_to_jsonl(self.base_url, out_dir, query, filter, partitions,
+            partition_by, limit, concurrency, compress, max_records, self.session, kwargs)
+
+    def works_sync(self, filter = None, state_path = None, query = None,
+                   by = "index_date", limit = 1000, **kwargs):
+        '''
+        Fetch only the works indexed or updated since the last sync
+
+        Yields each work matching `query` and `filter` that was indexed (or
+        updated, with `by = "update_date"`) since the last successful run, as
+        an upsert: insert it, or replace the copy you have with the same DOI.
+        The watermark, the UTC date the run started, is written to `state_path`
+        after the last work is yielded, via a temporary file that then replaces
+        it, so the file always holds a complete watermark. A run that fails or
+        is stopped early is done again in full next time.
+
+        The first run (with no `state_path` file) fetches everything matching
+        `filter`; give `from_index_date` (or `from_update_date`) in `filter`
+        to start from a date instead. Later runs replace that date with the
+        watermark. Crossref date filters are by day, so works changed on the
+        day of the last run are fetched again, and Crossref doesn't report
+        deleted works.
+
+        :param filter: [Hash] Filter options. See :func:`~habanero.Crossref.works`
+        :param state_path: [String] Path of the JSON file keeping the watermark
+        :param query: [String] A query string
+        :param by: [String] One of `index_date` (default), for works indexed
+            since the last run (any change, including citation counts), or
+            `update_date`, for works whose metadata was updated by the publisher
+        :param limit: [Fixnum] Number of results per page. Default: 1000
+        :param kwargs: any additional arguments will be passed on to
+            `requests.get`
+
+        :return: A generator of works (dicts)
+
+        Usage::
+
+            from habanero import Crossref
+            cr = Crossref(mailto = "name@example.com")
+            # nightly, e.g., from cron
+            for x in cr.works_sync(filter = {'member': 98}, state_path = "member-98.json"):
+                db.upsert(x['DOI'], x)
+            # start from a date
+            cr.works_sync(filter = {'member': 98, 'from_update_date': '2018-01-01'},
+              state_path = "member-98-updates.json", by = "update_date")
+        '''
+        if state_path is None:
+            raise ValueError("state_path is required, to keep the watermark between runs")
+        kwargs = dict(kwargs, mailto = self.mailto, api_key = self.api_key)
+        return sync_items(self.base_url, state_path, query, filter, by, limit,
+            self.session, kwargs)
+
+    def works_batch(self, ids, chunk_size = 100, max_url_length = 4000,
+                    concurrency = None, select = None, **kwargs):
+        '''
+        Look up many DOIs with few requests
+
+        Where :func:`~habanero.Crossref.works` makes one request per DOI, this
+        packs chunks of DOIs into single `/works` requests filtered on
+        `doi:a,doi:b,...`, keeping each URL under `max_url_length` characters.
+        Results are matched back to the input DOIs, ignoring case.
+
+        :param ids: [Array] DOIs
+        :param chunk_size: [Fixnum] Max DOIs per request. Default: 100. Max: 1000
+        :param max_url_length: [Fixnum] Max length of each request URL. Default: 4000
+        :param concurrency: [Fixnum] Number of chunks to request in parallel. Default:
+            None (one at a time)
+        :param select: [Array] Fields to return for each work, see
+            :func:`~habanero.Crossref.works`. `DOI` is always included, to match
+            results to `ids`. Default: None (all fields)
+        :param kwargs: any additional arguments will be passed on to
+            `requests.get`
+
+        :return: A dict, with `items`, a list with the work (a dict) for each
+            of `ids`, in the same order, or None if not found, and `not_found`,
+            a list of the DOIs not found
+
+        Usage::
+
+            from habanero import Crossref
+            cr = Crossref()
+            dois = ['10.1371/journal.pone.0033693', '10.1038/srep16696',
+              '10.1002/jor.1100150407', '10.9999/not.a.doi']
+            res = cr.works_batch(dois)
+            [ x['title'] for x in res['items'] if x is not None ]
+            res['not_found']
+            # just the titles, 4 chunks at a time
+            res = cr.works_batch(dois, concurrency = 4, select = ['DOI', 'title'])
+        '''
+        if chunk_size.__class__ != int or not 0 < chunk_size <= 1000:
+            raise ValueError("chunk_size must be an int from 1 to 1000")
+        return works_batch(self.base_url, ids, chunk_size, max_url_length,
+            concurrency, select, session = self.session, cache = self.cache,
+            mailto = self.mailto, api_key = self.api_key, **kwargs)
 
     def members(self, ids = None, query = None, filter = None, offset = None,
               limit = None, sample = None, sort = None,
               order = None, facet = None, works = False,
-              cursor = None, cursor_max = 5000, **kwargs):
+              cursor = None, cursor_max = 5000, concurrency = None,
+              as_completed = False, **kwargs):
         '''
         Search Crossref members
 
@@ -184,6 +608,12 @@ class Crossref(object):
         :param order: [String] Sort order, one of 'asc' or 'desc'
         :param facet: [Boolean] Include facet results. Default: false
         :param works: [Boolean] If true, works returned as well. Default: false
+        :param concurrency: [Fixnum] Number of ids to request in parallel. Only used
+            when many ids are passed in. Size the connection pool to match,
+            see :class:`~habanero.Crossref`. Default: None (one at a time)
+        :param as_completed: [Boolean] If true, and ids are passed in, return a generator
+            yielding `(id, result)` tuples as each request finishes, instead of a
+            list in the order of `ids`. Default: false
         :param kwargs: any additional arguments will be passed on to
             `requests.get`
 
@@ -213,12 +643,17 @@ class Crossref(object):
         '''
         return request(self.base_url, "/members/", ids,
             query, filter, offset, limit, sample, sort,
-            order, facet, works, cursor, cursor_max, **kwargs)
+            order, facet, works, cursor, cursor_max, session = self.session,
+            cache = self.cache, memo = self.memo,
+            mailto = self.mailto, api_key = self.api_key,
+            concurrency = concurrency, as_completed = as_completed,
+            lazy = self.lazy, **kwargs)
 
     def prefixes(self, ids = None, filter = None, offset = None,
               limit = None, sample = None, sort = None,
               order = None, facet = None, works = False,
-              cursor = None, cursor_max = 5000, **kwargs):
+              cursor = None, cursor_max = 5000, concurrency = None,
+              as_completed = False, **kwargs):
         '''
         Search Crossref prefixes
 
@@ -237,6 +672,12 @@ class Crossref(object):
         :param order: [String] Sort order, one of 'asc' or 'desc'
         :param facet: [Boolean] Include facet results. Default: false
         :param works: [Boolean] If true, works returned as well. Default: false
+        :param concurrency: [Fixnum] Number of ids to request in parallel. Only used
+            when many ids are passed in. Size the connection pool to match,
+            see :class:`~habanero.Crossref`. Default: None (one at a time)
+        :param as_completed: [Boolean] If true, and ids are passed in, return a generator
+            yielding `(id, result)` tuples as each request finishes, instead of a
+            list in the order of `ids`. Default: false
         :param kwargs: any additional arguments will be passed on to
             `requests.get`
 
@@ -274,12 +715,17 @@ class Crossref(object):
         return request(self.base_url, "/prefixes/", ids,
           query = None, filter = filter, offset = offset, limit = limit,
           sample = sample, sort = sort, order = order, facet = facet, works = works,
-          cursor = cursor, cursor_max = cursor_max, **kwargs)
+          cursor = cursor, cursor_max = cursor_max, session = self.session,
+          cache = self.cache, memo = self.memo,
+          mailto = self.mailto, api_key = self.api_key,
+          concurrency = concurrency, as_completed = as_completed,
+          lazy = self.lazy, **kwargs)
 
     def funders(self, ids = None, query = None, filter = None, offset = None,
               limit = None, sample = None, sort = None,
               order = None, facet = None, works = False,
-              cursor = None, cursor_max = 5000, **kwargs):
+              cursor = None, cursor_max = 5000, concurrency = None,
+              as_completed = False, **kwargs):
         '''
         Search Crossref funders
 
@@ -302,6 +748,12 @@ class Crossref(object):
         :param order: [String] Sort order, one of 'asc' or 'desc'
         :param facet: [Boolean] Include facet results. Default: false
         :param works: [Boolean] If true, works returned as well. Default: false
+        :param concurrency: [Fixnum] Number of ids to request in parallel. Only used
+            when many ids are passed in. Size the connection pool to match,
+            see :class:`~habanero.Crossref`. Default: None (one at a time)
+        :param as_completed: [Boolean] If true, and ids are passed in, return a generator
+            yielding `(id, result)` tuples as each request finishes, instead of a
+            list in the order of `ids`. Default: false
         :param kwargs: any additional arguments will be passed on to
             `requests.get`
 
@@ -331,12 +783,17 @@ class Crossref(object):
         '''
         return request(self.base_url, "/funders/", ids,
           query, filter, offset, limit, sample, sort,
-          order, facet, works, cursor, cursor_max, **kwargs)
+          order, facet, works, cursor, cursor_max, session = self.session,
+          cache = self.cache, memo = self.memo,
+          mailto = self.mailto, api_key = self.api_key,
+          concurrency = concurrency, as_completed = as_completed,
+          lazy = self.lazy, **kwargs)
 
     def journals(self, ids = None, query = None, filter = None, offset = None,
               limit = None, sample = None, sort = None,
               order = None, facet = None, works = False,
-              cursor = None, cursor_max = 5000, **kwargs):
+              cursor = None, cursor_max = 5000, concurrency = None,
+              as_completed = False, **kwargs):
         '''
         Search Crossref journals
 
@@ -356,6 +813,12 @@ class Crossref(object):
         :param order: [String] Sort order, one of 'asc' or 'desc'
         :param facet: [Boolean] Include facet results. Default: false
         :param works: [Boolean] If true, works returned as well. Default: false
+        :param concurrency: [Fixnum] Number of ids to request in parallel. Only used
+            when many ids are passed in. Size the connection pool to match,
+            see :class:`~habanero.Crossref`. Default: None (one at a time)
+        :param as_completed: [Boolean] If true, and ids are passed in, return a generator
+            yielding `(id, result)` tuples as each request finishes, instead of a
+            list in the order of `ids`. Default: false
         :param kwargs: any additional arguments will be passed on to
             `requests.get`
 
@@ -397,12 +860,17 @@ class Crossref(object):
         '''
         return request(self.base_url, "/journals/", ids,
           query, filter, offset, limit, sample, sort,
-          order, facet, works, cursor, cursor_max, **kwargs)
+          order, facet, works, cursor, cursor_max, session = self.session,
+          cache = self.cache, memo = self.memo,
+          mailto = self.mailto, api_key = self.api_key,
+          concurrency = concurrency, as_completed = as_completed,
+          lazy = self.lazy, **kwargs)
 
     def types(self, ids = None, query = None, filter = None, offset = None,
               limit = None, sample = None, sort = None,
               order = None, facet = None, works = False,
-              cursor = None, cursor_max = 5000, **kwargs):
+              cursor = None, cursor_max = 5000, concurrency = None,
+              as_completed = False, **kwargs):
         '''
         Search Crossref types
 
@@ -422,6 +890,12 @@ class Crossref(object):
         :param order: [String] Sort order, one of 'asc' or 'desc'
         :param facet: [Boolean] Include facet results. Default: false
         :param works: [Boolean] If true, works returned as well. Default: false
+        :param concurrency: [Fixnum] Number of ids to request in parallel. Only used
+            when many ids are passed in. Size the connection pool to match,
+            see :class:`~habanero.Crossref`. Default: None (one at a time)
+        :param as_completed: [Boolean] If true, and ids are passed in, return a generator
+            yielding `(id, result)` tuples as each request finishes, instead of a
+            list in the order of `ids`. Default: false
         :param kwargs: any additional arguments will be passed on to
             `requests.get`
 
@@ -442,7 +916,11 @@ class Crossref(object):
         '''
         return request(self.base_url, "/types/", ids,
             query, filter, offset, limit, sample, sort,
-            order, facet, works, cursor, cursor_max, **kwargs)
+            order, facet, works, cursor, cursor_max, session = self.session,
+            cache = self.cache, memo = self.memo,
+            mailto = self.mailto, api_key = self.api_key,
+            concurrency = concurrency, as_completed = as_completed,
+            lazy = self.lazy, **kwargs)
 
     def licenses(self, query = None, offset = None,
               limit = None, sample = None, sort = None,
@@ -476,14 +954,26 @@ class Crossref(object):
         check_kwargs(["ids", "filter", "works"], kwargs)
         res = request(self.base_url, "/licenses/", None,
             query, None, offset, limit, None, sort,
-            order, facet, None, None, None, None, **kwargs)
+            order, facet, None, None, None, None, session = self.session,
+            cache = self.cache, mailto = self.mailto, api_key = self.api_key,
+            lazy = self.lazy, **kwargs)
         return res
 
-    def registration_agency(self, ids, **kwargs):
+    def registration_agency(self, ids, concurrency = None, as_completed = False,
+                            **kwargs):
         '''
         Determine registration agency for DOIs
 
+        The agency is set by the DOI prefix, so DOIs are grouped by prefix and
+        one request is made per prefix, falling back to another DOI with the
+        same prefix if a request fails. Agencies are cached by prefix in
+        `agency_cache`, see :class:`~habanero.Crossref`.
+
         :param ids: [Array] DOIs (digital object identifier) or other identifiers
+        :param concurrency: [Fixnum] Number of prefixes to request in parallel.
+            Default: None (one at a time)
+        :param as_completed: [Boolean] If true, return a generator yielding
+            `(doi, agency)` tuples as each prefix is resolved. Default: false
         :param kwargs: any additional arguments will be passed on to
             `requests.get`
 
@@ -495,18 +985,14 @@ class Crossref(object):
             cr = Crossref()
             cr.registration_agency('10.1371/journal.pone.0033693')
             cr.registration_agency(ids = ['10.1007/12080.1874-1746','10.1007/10452.1573-5125', '10.1111/(issn)1442-9993'])
+            cr.registration_agency(ids = ['10.1007/12080.1874-1746','10.1007/10452.1573-5125'], concurrency = 2)
         '''
         check_kwargs(["query", "filter", "offset", "limit", "sample", "sort",
             "order", "facet", "works"], kwargs)
-        res = request(self.base_url, "/works/", ids,
-            None, None, None, None, None, None,
-            None, None, None, None, None, True, **kwargs)
-        if res.__class__ != list:
-            k = []
-            k.append(res)
-        else:
-            k = res
-        return [ z['message']['agency']['label'] for z in k ]
+        return prefix_agencies(self.base_url, ids, self.agency_cache,
+            concurrency, as_completed, session = self.session,
+            cache = self.cache, memo = self.memo,
+            mailto = self.mailto, api_key = self.api_key, **kwargs)
 
     def random_dois(self, sample = 10, **kwargs):
         '''
@@ -529,9 +1015,27 @@ class Crossref(object):
         '''
         res = request(self.base_url, "/works/", None,
             None, None, None, None, sample, None,
-            None, None, True, **kwargs)
+            None, None, True, session = self.session,
+            cache = self.cache, mailto = self.mailto, api_key = self.api_key,
+            **kwargs)
         return [ z['DOI'] for z in res['message']['items'] ]
 
+    @staticmethod
+    def select_fields():
+        '''
+        Select fields - names of the work fields that can be passed to `select`
+
+        :return: list
+
+        Usage::
+
+            from habanero import Crossref
+            cr = Crossref()
+            cr.select_fields()
+            cr.works(query = "ecology", select = ['DOI', 'title'])
+        '''
+        return work_fields
+
     @staticmethod
     def filter_names():
         '''
@@ -0,0 +1,72 @@
+import json
+
+backends = ['orjson', 'ujson', 'simdjson', 'json']
+
+def _stdlib_loads(body):
+  if isinstance(body, bytes):
+    body = body.decode('utf-8')
+  return json.loads(body)
+
+def _load_backend(name):
+  if name == 'json':
+    return _stdlib_loads
+  if name == 'orjson':
+    import orjson
+    return orjson.loads
+  if name == 'ujson':
+    import ujson
+    return ujson.loads
+  if name == 'simdjson':
+    import simdjson
+    return simdjson.loads
+  raise ValueError("json backend must be one of %s, or 'auto'" % ', '.join(backends))
+
+def _auto_backend():
+  for name in backends:
+    try:
+      return name, _load_backend(name)
+    except ImportError:
+      pass
+
+_backend, _loads = _auto_backend()
+
+def set_json_backend(name = 'auto'):
+  '''
+  Set the JSON decoder used for all Crossref responses
+
+  By default the fastest installed decoder is used, trying orjson, ujson,
+  and simdjson, and falling back to the standard library `json` module.
+  Decoding large works pages (e.g., 1000 items) is a large share of the
+  time spent paging through results, so a fast decoder helps most with
+  cursors and harvests.
+
+  :param name: [String] One of 'orjson', 'ujson', 'simdjson', 'json', or
+      'auto' to pick the fastest installed. Default: 'auto'
+
+  :return: the name of the backend now in use
+
+  Usage::
+
+      from habanero import set_json_backend, get_json_backend
+      get_json_backend()
+      set_json_backend('json')
+      set_json_backend('auto')
+  '''
+  global _backend, _loads
+  if name == 'auto':
+    _backend, _loads = _auto_backend()
+  else:
+    _backend, _loads = name, _load_backend(name)
+  return _backend
+
+def get_json_backend():
+  '''
+  Name of the JSON decoder in use
+  '''
+  return _backend
+
+def loads(body):
+  '''
+  Decode a JSON response body, bytes or text, with the configured backend
+  '''
+  return _loads(body)
@@ -23,8 +23,14 @@ def filter_handler(x = None):
     newnn = [ re.sub("_", "-", z) for z in nn ]
     newnnd = dict(zip(x.keys(), newnn))
     x = rename_keys(x, newnnd)
-    x = ','.join(['{}:{}'.format(k,v) for k,v in x.items()])
-    return x
+    # a list of values repeats the filter, e.g. doi:a,doi:b
+    out = []
+    for k, v in x.items():
+      if v.__class__ in (list, tuple):
+        out.extend([ '{}:{}'.format(k,z) for z in v ])
+      else:
+        out.append('{}:{}'.format(k,v))
+    return ','.join(out)
 
 others = ['license_url','license_version','license_delay',
           'full_text_version','full_text_type','award_number',
@@ -1,11 +1,29 @@
+import os
 import re
 import requests
+from multiprocessing.pool import ThreadPool
 from . import __version__
+from .filterhandler import filter_handler
+from .selecthandler import select_handler
+from .exceptions import *
 
-from .response import Works
-from .noworks import NoWorks
+from .response import Works,LazyWorks
+from .noworks import NoWorks,LazyNoWorks
+from .cache import cacheable
+from .decoder import loads
 
 # helpers ----------
+def replace_file(src, dst):
+  '''
+  Move `src` to `dst` in one step, replacing `dst` if it exists, so that
+  `dst` is never missing or half written
+  '''
+  if hasattr(os, 'replace'):
+    os.replace(src, dst)
+  else:
+    # Python 2: rename replaces atomically on POSIX
+    os.rename(src, dst)
+
 def converter(x):
   if(x.__class__.__name__ == 'str'):
       return [x]
@@ -24,6 +42,52 @@ def switch_classes(x, path, works):
   else:
   	return NoWorks(result = x)
 
+def lazy_classes(body, path, works):
+  '''
+  Like `switch_classes`, for a raw response body, decoded when used
+  '''
+  if works or re.sub("/", "", path) == "works":
+    return LazyWorks(body)
+  else:
+    return LazyNoWorks(body)
+
+def map_concurrent(fun, x, concurrency = None):
+  '''
+  Apply `fun` to each element of `x` using up to `concurrency` threads,
+  returning results in the same order as `x`
+  '''
+  if not concurrency or concurrency < 2 or len(x) < 2:
+    return [ fun(z) for z in x ]
+  pool = ThreadPool(min(concurrency, len(x)))
+  try:
+    return pool.map(fun, x)
+  finally:
+    pool.terminate()
+
+def imap_concurrent(fun, x, concurrency = None):
+  '''
+  Like `map_concurrent`, but a generator yielding results in the order
+  of `x` as soon as each is ready, instead of a list at the end
+  '''
+  pool = ThreadPool(min(concurrency or 1, max(len(x), 1)))
+  try:
+    for res in pool.imap(fun, x):
+      yield res
+  finally:
+    pool.terminate()
+
+def map_as_completed(fun, x, concurrency = None):
+  '''
+  Like `map_concurrent`, but a generator yielding `(element, result)`
+  tuples in the order requests finish
+  '''
+  pool = ThreadPool(min(concurrency or 1, max(len(x), 1)))
+  try:
+    for res in pool.imap_unordered(lambda z: (z, fun(z)), x):
+      yield res
+  finally:
+    pool.terminate()
+
 def check_kwargs(keys, kwargs):
   for x in range(len(keys)):
     if keys[x] in kwargs.keys():
@@ -46,18 +110,86 @@ def is_json(x):
     return True
 
 def parse_json_err(x):
-  return x.json()['message'][0]['message']
+  return loads(x.content)['message'][0]['message']
 
-def make_ua():
+def make_ua(mailto = None, api_key = None):
     requa = 'python-requests/' + requests.__version__
     habua = 'habanero/%s' % __version__
     ua = requa + ' ' + habua
+    if mailto is not None:
+      ua = ua + ' (mailto:%s)' % mailto
     str = {
       'User-Agent': ua,
       'X-USER-AGENT': ua
     }
+    if api_key is not None:
+      str['Crossref-Plus-API-Token'] = 'Bearer ' + api_key
     return str
 
+def http_get(url, payload, session, cache = None, mailto = None, api_key = None):
+  '''
+  GET a Crossref API route and return the raw response body
+
+  Errors from the API are raised as `RequestError`. If a cache is given,
+  cached bodies are returned without a request, and new ones saved.
+  Expired entries with an ETag or Last-Modified date are revalidated with
+  a conditional request, and reused if the server answers 304.
+  `mailto` is sent in the User-Agent and as a parameter, for the polite
+  pool, and `api_key` as a Crossref Plus token. Neither is part of the
+  cache key.
+  '''
+  use_cache = cache is not None and cacheable(payload)
+  head = make_ua(mailto, api_key)
+  cached = None
+  if use_cache:
+    cached = cache.lookup(url, payload)
+    if cached is not None:
+      if cached[3]:
+        return cached[0]
+      if cached[1] is not None:
+        head['If-None-Match'] = cached[1]
+      if cached[2] is not None:
+        head['If-Modified-Since'] = cached[2]
+  try:
+    params = payload
+    if mailto is not None:
+      params = dict(payload, mailto = mailto)
+    r = session.get(url, params = params, headers = head)
+    if r.status_code == 304 and cached is not None:
+      cache.renew(url, payload)
+      return cached[0]
+    r.raise_for_status()
+  except requests.exceptions.HTTPError:
+    if is_json(r):
+      raise RequestError(r.status_code, parse_json_err(r))
+    else:
+      r.raise_for_status()
+  except requests.exceptions.RequestException as e:
+    print(e)
+    raise
+  check_json(r)
+  if use_cache:
+    cache.set(url, payload, r.content, r.headers.get('ETag'),
+      r.headers.get('Last-Modified'))
+  return r.content
+
+def build_payload(query = None, filter = None, offset = None, limit = None,
+  sample = None, sort = None, order = None, facet = None, cursor = None,
+  kwargs = None, select = None):
+  '''
+  Build query parameters for a Crossref API request
+  '''
+  filt = filter_handler(filter)
+  payload = {'query':query, 'filter':filt, 'offset':offset,
+             'rows':limit, 'sample':sample, 'sort':sort,
+             'order':order, 'facet':facet, 'cursor':cursor,
+             'select':select_handler(select)}
+  payload = dict((k, v) for k, v in payload.items() if v)
+  # add query filters
+  payload.update(filter_dict(kwargs or {}))
+  # rename query filters
+  return rename_query_filters(payload)
+
 def filter_dict(x):
   return dict((k, x[k]) for k, v in x.items() if k.find('query_') == 0 )
 
@@ -0,0 +1,364 @@
+import os
+import gzip
+import json
+import datetime
+import threading
+try:
+  from queue import Queue, Empty, Full
+except ImportError:
+  from Queue import Queue, Empty, Full
+
+from .request_class import Request
+from .habanero_utils import replace_file
+
+date_fields = {
+  'index_date': ('from_index_date', 'until_index_date'),
+  'pub_date': ('from_pub_date', 'until_pub_date'),
+}
+list_fields = ['prefix', 'member']
+
+# where to start bisecting date ranges that have no lower bound
+earliest = {
+  'index_date': datetime.date(2000, 1, 1),
+  'pub_date': datetime.date(1900, 1, 1),
+}
+
+def parse_date(x, end = False):
+  '''
+  Date from a filter value, which may be just a year or year and month.
+  Partial dates are the first day of the period, or the last with `end`,
+  so that an until date still covers all of it.
+  '''
+  parts = [ int(z) for z in str(x).split('-') ]
+  if not end or len(parts) == 3:
+    parts = parts + [1, 1]
+    return datetime.date(parts[0], parts[1], parts[2])
+  if len(parts) == 1:
+    return datetime.date(parts[0], 12, 31)
+  nxt = datetime.date(parts[0] + parts[1] // 12, parts[1] % 12 + 1, 1)
+  return nxt - datetime.timedelta(days = 1)
+
+def count_works(url, query, filter, session, kwargs):
+  '''
+  Number of works matching a query and filter, from a rows=0 request
+  '''
+  req = Request(url, "/works/", query, filter, session = session, **kwargs)
+  payload = req._payload()
+  payload['rows'] = 0
+  return req._req(payload = payload)['message']['total-results']
+
+def slice_filter(filter, partition_by, start, end):
+  lower, upper = date_fields[partition_by]
+  filt = dict(filter or {})
+  filt.pop(lower, None)
+  filt.pop(upper, None)
+  if start is not None:
+    filt[lower] = start.isoformat()
+  if end is not None:
+    filt[upper] = end.isoformat()
+  return filt
+
+def partition_filters(url, query, filter, partitions, partition_by, session, kwargs):
+  '''
+  Split a works query into disjoint filters
+
+  For date fields, `partitions` is the number of slices wanted. The date
+  range (from the filter, else open-ended) is bisected, always splitting
+  the slice with the most works, using rows=0 requests to size slices.
+  For prefix and member, `partitions` is the list of values, one slice each.
+  '''
+  if partition_by in list_fields:
+    if partitions.__class__ not in (list, tuple):
+      raise ValueError("partitions must be a list of %s values when partitioning by %s" %
+        (partition_by, partition_by))
+    out = []
+    for x in partitions:
+      filt = dict(filter or {})
+      filt[partition_by] = x
+      out.append(filt)
+    return out
+
+  if partition_by not in date_fields:
+    raise ValueError("partition_by must be one of %s" %
+      ', '.join(sorted(list(date_fields.keys()) + list_fields)))
+  if partitions.__class__ != int or partitions < 1:
+    raise ValueError("partitions must be a positive int when partitioning by date")
+
+  lower, upper = date_fields[partition_by]
+  start = (filter or {}).get(lower)
+  end = (filter or {}).get(upper)
+  start = None if start is None else parse_date(start)
+  end = None if end is None else parse_date(end, end = True)
+  # each slice: [count, from, until, lo, hi], from/until None when open-ended
+  slices = [[count_works(url, query, filter, session, kwargs), start, end,
+    start or earliest[partition_by], end or datetime.date.today()]]
+  while len(slices) < partitions:
+    splittable = [ z for z in slices if z[4] > z[3] and z[0] > 0 ]
+    if not splittable:
+      break
+    big = max(splittable, key = lambda z: z[0])
+    mid = big[3] + (big[4] - big[3]) // 2
+    left_count = count_works(url, query,
+      slice_filter(filter, partition_by, big[1], mid), session, kwargs)
+    left = [left_count, big[1], mid, big[3], mid]
+    nxt = mid + datetime.timedelta(days = 1)
+    right = [max(big[0] - left_count, 0), nxt, big[2], nxt, big[4]]
+    slices.remove(big)
+    slices.extend([left, right])
+  slices.sort(key = lambda z: z[3])
+  return [ slice_filter(filter, partition_by, z[1], z[2]) for z in slices ]
+
+def harvest_items(url, query, filters, limit = 1000, cursor_max = None,
+  concurrency = None, session = None, kwargs = None):
+  '''
+  Generator yielding works from one cursor per filter, run in parallel
+
+  Items are deduplicated by DOI, since a record can move between
+  slices (e.g., be re-indexed) while a harvest runs.
+  '''
+  kwargs = kwargs or {}
+  todo = Queue()
+  for filt in filters:
+    todo.put(filt)
+  out = Queue(maxsize = (limit or 20) * 2)
+  stop = threading.Event()
+  done = object()
+  nworkers = max(min(concurrency or len(filters), len(filters)), 1)
+
+  def put(x):
+    while not stop.is_set():
+      try:
+        out.put(x, timeout = 0.1)
+        return
+      except Full:
+        pass
+
+  def work():
+    try:
+      while not stop.is_set():
+        try:
+          filt = todo.get_nowait()
+        except Empty:
+          return
+        req = Request(url, "/works/", query, filt, None, limit, None, None,
+          None, None, "*", None, session = session, **kwargs)
+        for item in req.iter_items():
+          if stop.is_set():
+            return
+          put(item)
+    except Exception as e:
+      put(e)
+    finally:
+      put(done)
+
+  workers = [ threading.Thread(target = work) for i in range(nworkers) ]
+  for w in workers:
+    w.daemon = True
+    w.start()
+
+  seen = set()
+  finished = 0
+  try:
+    while finished < nworkers:
+      item = out.get()
+      if item is done:
+        finished += 1
+        continue
+      if isinstance(item, Exception):
+        raise item
+      doi = item.get('DOI', '').lower()
+      if doi in seen:
+        continue
+      seen.add(doi)
+      yield item
+      if cursor_max is not None and len(seen) >= cursor_max:
+        return
+  finally:
+    stop.set()
+
+def write_json(path, obj):
+  '''
+  Write JSON to `path` atomically, via a temporary file
+  '''
+  tmp = path + ".tmp"
+  with open(tmp, "w") as f:
+    json.dump(obj, f)
+  replace_file(tmp, path)
+
+class JSONLWriter(object):
+  '''
+  Writes items as JSON Lines to `prefix-00000.jsonl` (or `.jsonl.gz`),
+  starting a new file every `max_records` items. Files are written under
+  a temporary name until `commit` renames them.
+  '''
+  def __init__(self, prefix, compress = False, max_records = None):
+    self.prefix = prefix
+    self.compress = compress
+    self.max_records = max_records
+    self.count = 0
+    self.files = []
+    self._file = None
+
+  def _open(self):
+    name = "%s-%05d.jsonl%s" % (self.prefix, len(self.files), ".gz" if self.compress else "")
+    self.files.append(name)
+    if self.compress:
+      self._file = gzip.open(name + ".tmp", "wb")
+    else:
+      self._file = open(name + ".tmp", "wb")
+
+  def write(self, item):
+    if self._file is None or (self.max_records and self.count % self.max_records == 0):
+      self.close()
+      self._open()
+    self._file.write((json.dumps(item) + "\n").encode('utf-8'))
+    self.count += 1
+
+  def close(self):
+    if self._file is not None:
+      self._file.close()
+      self._file = None
+
+  def commit(self):
+    self.close()
+    for name in self.files:
+      replace_file(name + ".tmp", name)
+    return [ os.path.basename(z) for z in self.files ]
+
+def harvest_to_jsonl(url, out_dir, query = None, filter = None, partitions = 4,
+  partition_by = "index_date", limit = 1000, concurrency = None, compress = False,
+  max_records = None, session = None, kwargs = None):
+  '''
+  Harvest works to JSON Lines files in `out_dir`, one set of files per
+  slice (see `partition_filters`), checkpointing each finished slice in
+  `out_dir/checkpoint.json`
+
+  Run again with the same arguments to resume: finished slices are
+  skipped, and unfinished ones harvested again from the start, since
+  cursors expire after a few minutes and can't be resumed after a crash.
+
+  Unlike `harvest_items`, duplicates aren't dropped: a work that moves
+  between slices while they run (e.g., is re-indexed) is in the files of
+  both. Skipping it in one slice is only safe if the other finishes, which
+  a crash can prevent, and finished slices may be from an earlier run.
+  '''
+  kwargs = kwargs or {}
+  if not os.path.isdir(out_dir):
+    os.makedirs(out_dir)
+  path = os.path.join(out_dir, "checkpoint.json")
+  # as saved to JSON, before filters are touched by requests
+  args = json.loads(json.dumps({'query': query, 'filter': filter,
+    'partitions': partitions, 'partition_by': partition_by}))
+  if os.path.exists(path):
+    with open(path) as f:
+      state = json.load(f)
+    if state['args'] != args:
+      raise ValueError("%s holds a checkpoint for a different harvest: %s" % (out_dir, state['args']))
+  else:
+    state = {'args': args, 'slices': partition_filters(url, query, filter,
+      partitions, partition_by, session, kwargs), 'done': {}}
+    write_json(path, state)
+
+  todo = Queue()
+  for i, filt in enumerate(state['slices']):
+    if str(i) not in state['done']:
+      todo.put((i, filt))
+  lock = threading.Lock()
+  errors = []
+
+  def work():
+    while not errors:
+      try:
+        i, filt = todo.get_nowait()
+      except Empty:
+        return
+      try:
+        writer = JSONLWriter(os.path.join(out_dir, "slice-%04d" % i), compress, max_records)
+        last_doi = None
+        last_indexed = None
+        req = Request(url, "/works/", query, filt, None, limit, None, None,
+          None, None, "*", None, session = session, **kwargs)
+        for item in req.iter_items():
+          writer.write(item)
+          last_doi = item.get('DOI', last_doi)
+          indexed = item.get('indexed', {}).get('date-time')
+          if indexed is not None and (last_indexed is None or indexed > last_indexed):
+            last_indexed = indexed
+        files = writer.commit()
+      except Exception as e:
+        writer.close()
+        errors.append(e)
+        return
+      with lock:
+        state['done'][str(i)] = {'count': writer.count, 'files': files,
+          'last_doi': last_doi, 'last_index_date': last_indexed}
+        write_json(path, state)
+
+  nworkers = max(min(concurrency or len(state['slices']), len(state['slices'])), 1)
+  workers = [ threading.Thread(target = work) for i in range(nworkers) ]
+  for w in workers:
+    w.daemon = True
+    w.start()
+  for w in workers:
+    w.join()
+  if errors:
+    raise errors[0]
+  done = state['done'].values()
+  return {'count': sum([ z['count'] for z in done ]),
+    'slices': len(state['slices']),
+    'files': sorted([ os.path.join(out_dir, f) for z in done for f in z['files'] ])}
+
+def utc_now():
+  '''
+  Current UTC time; utcnow is deprecated on Python 3.12, and timezone
+  isn't in Python 2
+  '''
+  if hasattr(datetime, 'timezone'):
+    return datetime.datetime.now(datetime.timezone.utc)
+  return datetime.datetime.utcnow()
+
+sync_fields = {
+  'index_date': 'from_index_date',
+  'update_date': 'from_update_date',
+}
+
+def sync_items(url, state_path, query = None, filter = None, by = "index_date",
+  limit = 1000, session = None, kwargs = None):
+  '''
+  Generator yielding works indexed (or updated) since the watermark in
+  `state_path`, storing the new watermark (atomically, with `write_json`)
+  once all are yielded
+
+  The watermark is the UTC date the run started. Crossref date filters are
+  by day, and inclusive, so the next run asks for works from that day on:
+  works changed later on the same day are fetched again, never missed.
+  '''
+  kwargs = kwargs or {}
+  if by not in sync_fields:
+    raise ValueError("by must be one of %s" % ', '.join(sorted(sync_fields.keys())))
+  lower = sync_fields[by]
+  filt = dict(filter or {})
+  # as saved to JSON, without the date the watermark replaces
+  args = json.loads(json.dumps({'query': query, 'by': by,
+    'filter': dict((k, v) for k, v in filt.items() if k != lower)}))
+  state = None
+  if os.path.exists(state_path):
+    with open(state_path) as f:
+      state = json.load(f)
+    if state['args'] != args:
+      raise ValueError("%s holds the state of a different sync: %s" % (state_path, state['args']))
+    filt[lower] = state['watermark']
+
+  def sync():
+    started = utc_now()
+    count = 0
+    for item in harvest_items(url, query, [filt], limit, None, 1, session, kwargs):
+      count += 1
+      yield item
+    folder = os.path.dirname(os.path.abspath(state_path))
+    if not os.path.isdir(folder):
+      os.makedirs(folder)
+    write_json(state_path, {'args': args, 'watermark': started.date().isoformat(),
+      'synced': started.strftime("%Y-%m-%dT%H:%M:%SZ"), 'since': filt.get(lower), 'count': count})
+
+  return sync()
@@ -1,3 +1,5 @@
+from .decoder import loads
+
 class NoWorks(object):
   '''
   Habanero: agency class
@@ -16,3 +18,19 @@ class NoWorks(object):
 
   def message(self):
     return self.result['message']
+
+class LazyNoWorks(NoWorks):
+  '''
+  Habanero: lazy agency class
+
+  Keeps the raw response body, decoding it the first time it's used
+  '''
+  def __init__(self, body):
+    self.body = body
+    self._result = None
+
+  @property
+  def result(self):
+    if self._result is None:
+      self._result = loads(self.body)
+    return self._result
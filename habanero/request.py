@@ -1,85 +1,71 @@
-import requests
-import json
-import re
-
-from .filterhandler import filter_handler
-from .habanero_utils import switch_classes,check_json,is_json,parse_json_err,make_ua,filter_dict,rename_query_filters
+from .habanero_utils import lazy_classes,build_payload,http_get,map_concurrent,map_as_completed
 from .exceptions import *
 from .request_class import Request
+from .session import default_session
+from .cache import cache_key
+from .decoder import loads
 
 def request(url, path, ids = None, query = None, filter = None,
         offset = None, limit = None, sample = None, sort = None,
         order = None, facet = None, works = None,
-        cursor = None, cursor_max = None, agency = False, **kwargs):
+        cursor = None, cursor_max = None, agency = False, session = None,
+        concurrency = None, as_completed = False, cache = None, memo = None,
+        mailto = None, api_key = None, select = None, lazy = False, **kwargs):
 
   url = url + path
+  if session is None:
+    session = default_session()
 
   if cursor_max.__class__.__name__ != 'NoneType':
     if cursor_max.__class__ != int:
       raise ValueError("cursor_max must be of class int")
 
-  filt = filter_handler(filter)
+  if select.__class__.__name__ != 'NoneType':
+    if ids.__class__.__name__ != 'NoneType' and not works:
+      raise ValueError("select can only be used when searching works, not with ids")
 
-  payload = {'query':query, 'filter':filt, 'offset':offset,
-             'rows':limit, 'sample':sample, 'sort':sort,
-             'order':order, 'facet':facet, 'cursor':cursor}
-  payload = dict((k, v) for k, v in payload.items() if v)
-  # add query filters
-  payload.update(filter_dict(kwargs))
-  # rename query filters
-  payload = rename_query_filters(payload)
+  payload = build_payload(query, filter, offset, limit, sample, sort,
+    order, facet, cursor, kwargs, select)
 
   if(ids.__class__.__name__ == 'NoneType'):
     url = url.strip("/")
-    try:
-      r = requests.get(url, params = payload, headers = make_ua())
-      r.raise_for_status()
-    except requests.exceptions.HTTPError:
-      if is_json(r):
-        raise RequestError(r.status_code, parse_json_err(r))
-      else:
-        r.raise_for_status()
-    except requests.exceptions.RequestException as e:
-      print(e)
-      raise
-    check_json(r)
-    coll = r.json()
-    # coll = switch_classes(js, path, works)
+    body = http_get(url, payload, session, cache, mailto, api_key)
+    coll = lazy_classes(body, path, works) if lazy else loads(body)
   else:
     if(ids.__class__.__name__ == "str"):
       ids = ids.split()
     if(ids.__class__.__name__ == "int"):
       ids = [ids]
-    coll = []
-    for i in range(len(ids)):
+
+    def fetch(id):
       if works:
-        res = Request(url, str(ids[i]) + "/works",
+        return Request(url, str(id) + "/works",
           query, filter, offset, limit, sample, sort,
-          order, facet, cursor, cursor_max, **kwargs).do_request()
-        coll.append(res)
+          order, facet, cursor, cursor_max, session = session,
+          cache = cache, mailto = mailto, api_key = api_key,
+          select = select, lazy = lazy, **kwargs).do_request()
       else:
         if agency:
-          endpt = url + str(ids[i]) + "/agency"
+          endpt = url + str(id) + "/agency"
         else:
-          endpt = url + str(ids[i])
+          endpt = url + str(id)
 
         endpt = endpt.strip("/")
 
-        try:
-          r = requests.get(endpt, params = payload, headers = make_ua())
-          r.raise_for_status()
-        except requests.exceptions.HTTPError:
-          if is_json(r):
-            raise RequestError(r.status_code, parse_json_err(r))
-          else:
-            r.raise_for_status()
-        except requests.exceptions.RequestException as e:
-          print(e)
-          raise
-        check_json(r)
-        js = r.json()
-        #tt_out = switch_classes(js, path, works)
-        coll.append(js)
+        if memo is not None:
+          key = cache_key(endpt, payload)
+          js = memo.get(key)
+          if js is not None:
+            return js
+        body = http_get(endpt, payload, session, cache, mailto, api_key)
+        js = lazy_classes(body, path, works) if lazy else loads(body)
+        if memo is not None:
+          memo.set(key, js)
+        return js
+
+    if as_completed:
+      return map_as_completed(fetch, ids, concurrency)
+    coll = map_concurrent(fetch, ids, concurrency)
 
     if len(coll) == 1:
       coll = coll[0]
@@ -1,10 +1,38 @@
-import requests
-import json
 import re
+import threading
+try:
+  from queue import Queue, Full
+except ImportError:
+  from Queue import Queue, Full
 
-from .filterhandler import filter_handler
-from .habanero_utils import switch_classes,check_json,is_json,parse_json_err,make_ua,filter_dict,rename_query_filters
+from .habanero_utils import build_payload,http_get
 from .exceptions import *
+from .session import default_session
+from .decoder import loads
+from .response import LazyWorks
+
+cursor_pattern = re.compile(br'"next-cursor"\s*:\s*("(?:[^"\\]|\\.)*")')
+total_pattern = re.compile(br'"total-results"\s*:\s*([0-9]+)')
+per_page_pattern = re.compile(br'"items-per-page"\s*:\s*([0-9]+)')
+
+def peek_page(body):
+  '''
+  Pull next-cursor, total-results and items-per-page out of a raw
+  /works page without decoding it. Crossref writes the first two
+  before the items array and the last one after it.
+  '''
+  items_at = body.find(b'"items"')
+  head = body if items_at < 0 else body[:items_at]
+  cu = cursor_pattern.search(head)
+  if cu is not None:
+    cu = loads(cu.group(1))
+  total = total_pattern.search(head)
+  if total is not None:
+    total = int(total.group(1))
+  per_page = per_page_pattern.search(body[-1024:])
+  if per_page is not None:
+    per_page = int(per_page.group(1))
+  return cu, total, per_page
 
 class Request(object):
   '''
@@ -15,7 +43,9 @@ class Request(object):
   def __init__(self, url, path, query = None, filter = None,
         offset = None, limit = None, sample = None, sort = None,
         order = None, facet = None, cursor = None, cursor_max = None,
-        agency = False, **kwargs):
+        agency = False, session = None, pipeline = False, prefetch = 2,
+        cache = None, mailto = None, api_key = None, select = None, lazy = False,
+        **kwargs):
     self.url = url
     self.path = path
     self.query = query
@@ -29,27 +59,42 @@ class Request(object):
     self.cursor = cursor
     self.cursor_max = cursor_max
     self.agency = agency
+    self.session = session or default_session()
+    self.pipeline = pipeline
+    self.prefetch = prefetch
+    self.cache = cache
+    self.mailto = mailto
+    self.api_key = api_key
+    self.select = select
+    self.lazy = lazy
     self.kwargs = kwargs
 
   def _url(self):
     tmpurl = self.url + self.path
     return tmpurl.strip("/")
 
-  def do_request(self):
-    filt = filter_handler(self.filter)
-
+  def _payload(self):
     if self.cursor_max.__class__.__name__ != 'NoneType':
       if self.cursor_max.__class__ != int:
         raise ValueError("cursor_max must be of class int")
 
-    payload = {'query':self.query, 'filter':filt, 'offset':self.offset,
-               'rows':self.limit, 'sample':self.sample, 'sort':self.sort,
-               'order':self.order, 'facet':self.facet, 'cursor':self.cursor}
-    payload = dict((k, v) for k, v in payload.items() if v)
-    # add query filters
-    payload.update(filter_dict(self.kwargs))
-    # rename query filters
-    payload = rename_query_filters(payload)
+    return build_payload(self.query, self.filter, self.offset,
+      self.limit, self.sample, self.sort, self.order, self.facet,
+      self.cursor, self.kwargs, self.select)
+
+  def do_request(self):
+    if self.pipeline and self.cursor.__class__.__name__ != 'NoneType':
+      pages = list(self.iter_pages())
+      js = pages[0]
+      if(js['message'].get('next-cursor').__class__.__name__ != 'NoneType' and
+         self.cursor_max > len(js['message']['items'])):
+        return pages
+      return js
+
+    payload = self._payload()
+
+    if self.lazy and self.cursor.__class__.__name__ == 'NoneType':
+      return LazyWorks(self._get(payload))
 
     js = self._req(payload = payload)
     cu = js['message'].get('next-cursor')
@@ -57,6 +102,120 @@ class Request(object):
     res = self._redo_req(js, payload, cu, max_avail)
     return res
 
+  def iter_pages(self):
+    '''
+    Generator yielding each page of results as soon as it arrives
+
+    Follows cursors with the same stopping rules as `do_request`, but
+    only holds one page in memory at a time. A `cursor_max` of None
+    follows the cursor to the end of the results.
+
+    With `pipeline` set, a background thread downloads the next pages
+    while the current one is decoded and consumed, holding at most
+    `prefetch` undecoded pages.
+    '''
+    payload = self._payload()
+    if self.pipeline and self.cursor.__class__.__name__ != 'NoneType':
+      for js in self._iter_pages_pipelined(payload):
+        yield js
+      return
+    js = self._req(payload = payload)
+    yield js
+    cu = js['message'].get('next-cursor')
+    max_avail = js['message']['total-results']
+    total = len(js['message']['items'])
+    cursor_max = self.cursor_max
+    if cursor_max.__class__.__name__ == 'NoneType':
+      cursor_max = max_avail
+    while(cu.__class__.__name__ != 'NoneType' and cursor_max > total and total < max_avail):
+      payload['cursor'] = cu
+      js = self._req(payload = payload)
+      cu = js['message'].get('next-cursor')
+      n = len(js['message']['items'])
+      if n == 0:
+        break
+      total += n
+      yield js
+
+  def _iter_pages_pipelined(self, payload):
+    pages = Queue(maxsize = self.prefetch)
+    stop = threading.Event()
+    done = object()
+    cursor_max = self.cursor_max
+
+    def put(x):
+      while not stop.is_set():
+        try:
+          pages.put(x, timeout = 0.1)
+          return
+        except Full:
+          pass
+
+    def produce():
+      try:
+        fetched = 0
+        while not stop.is_set():
+          body = self._get(payload)
+          cu, max_avail, per_page = peek_page(body)
+          put(body)
+          fetched += per_page or payload.get('rows', 20)
+          limit = max_avail
+          if cursor_max.__class__.__name__ != 'NoneType' and max_avail.__class__.__name__ != 'NoneType':
+            limit = min(cursor_max, max_avail)
+          if cu.__class__.__name__ == 'NoneType' or (limit.__class__.__name__ != 'NoneType' and fetched >= limit):
+            break
+          payload['cursor'] = cu
+      except Exception as e:
+        put(e)
+      put(done)
+
+    worker = threading.Thread(target = produce)
+    worker.daemon = True
+    worker.start()
+    try:
+      total = 0
+      first = True
+      while True:
+        body = pages.get()
+        if body is done:
+          # the producer stopped before the last decoded page says the
+          # results end (e.g., it couldn't find the cursor in the raw page),
+          # so follow the cursor from here one page at a time
+          while not first and cu.__class__.__name__ != 'NoneType' and limit > total and total < max_avail:
+            payload['cursor'] = cu
+            js = self._req(payload = payload)
+            cu = js['message'].get('next-cursor')
+            n = len(js['message']['items'])
+            if n == 0:
+              return
+            total += n
+            yield js
+          return
+        if isinstance(body, Exception):
+          raise body
+        js = loads(body)
+        n = len(js['message']['items'])
+        if not first and n == 0:
+          return
+        total += n
+        first = False
+        yield js
+        cu = js['message'].get('next-cursor')
+        max_avail = js['message']['total-results']
+        limit = max_avail if cursor_max.__class__.__name__ == 'NoneType' else cursor_max
+        if not(cu.__class__.__name__ != 'NoneType' and limit > total and total < max_avail):
+          return
+    finally:
+      stop.set()
+
+  def iter_items(self):
+    '''
+    Generator yielding each item of each page from `iter_pages`
+    '''
+    for page in self.iter_pages():
+      for item in page['message']['items']:
+        yield item
+
   def _redo_req(self, js, payload, cu, max_avail):
     if(cu.__class__.__name__ != 'NoneType' and self.cursor_max > len(js['message']['items'])):
       res = [js]
@@ -67,21 +226,14 @@ class Request(object):
         # out = _req(url = url, payload = payload)
         cu = out['message'].get('next-cursor')
         res.append(out)
-        total = sum([ len(z['message']['items']) for z in res ])
+        total += len(out['message']['items'])
       return res
     else:
       return js
 
   def _req(self, payload):
-    try:
-      r = requests.get(self._url(), params = payload, headers = make_ua())
-      r.raise_for_status()
-    except requests.exceptions.HTTPError:
-      if is_json(r):
-        raise RequestError(r.status_code, parse_json_err(r))
-      else:
-        r.raise_for_status()
-    except requests.exceptions.RequestException as e:
-      print(e)
-    check_json(r)
-    return r.json()
+    return loads(self._get(payload))
+
+  def _get(self, payload):
+    return http_get(self._url(), payload, self.session, self.cache,
+      self.mailto, self.api_key)
@@ -1,3 +1,10 @@
+import re
+import json
+
+from . import tabular
+from .decoder import loads
+from .store import WorkStore
+
 class Works(object):
   '''
   Habanero: response class
@@ -35,3 +42,164 @@ class Works(object):
       tmp = [ z.get('link') for z in self.result['message']['items'] ]
       tmp = [x for x in tmp if x is not None]
       return tmp
+
+  def works(self):
+      # a list of works, or a single work
+      if 'items' in self.result['message']:
+          return self.result['message']['items']
+      return [self.result['message']]
+
+  def to_arrow(self):
+      '''
+      Works as a `pyarrow.Table`, see :func:`~habanero.tabular.to_arrow`
+      '''
+      return tabular.to_arrow(self.works())
+
+  def to_pandas(self):
+      '''
+      Works as a `pandas.DataFrame`, see :func:`~habanero.tabular.to_pandas`
+      '''
+      return tabular.to_pandas(self.works())
+
+  def to_parquet(self, path, **kwargs):
+      '''
+      Write works to a Parquet file, see :func:`~habanero.tabular.write_parquet`
+      '''
+      return tabular.write_parquet(self.works(), path, **kwargs)
+
+  def to_store(self):
+      '''
+      Works in a compact :class:`~habanero.store.WorkStore`
+      '''
+      return WorkStore(self.works())
+
+class Work(object):
+  '''
+  Habanero: one work, from :func:`~habanero.response.LazyWorks.items`
+
+  A light wrapper around the dict for a work, with attributes for common
+  fields. Use it like the dict, e.g., `x['DOI']`, or `x.data` for the dict.
+  '''
+  __slots__ = ('data',)
+
+  def __init__(self, data):
+    self.data = data
+
+  def __repr__(self):
+    return "<Work %s>" % self.doi
+
+  def __getitem__(self, key):
+    return self.data[key]
+
+  def __contains__(self, key):
+    return key in self.data
+
+  def get(self, key, default = None):
+    return self.data.get(key, default)
+
+  def keys(self):
+    return self.data.keys()
+
+  @property
+  def doi(self):
+    return self.data.get('DOI')
+
+  @property
+  def title(self):
+    return tabular.first(self.data.get('title'))
+
+  @property
+  def type(self):
+    return self.data.get('type')
+
+  @property
+  def container_title(self):
+    return tabular.first(self.data.get('container-title'))
+
+  @property
+  def issued(self):
+    return self.data.get('issued', {}).get('date-parts', [[None]])[0]
+
+items_pattern = re.compile(r'"items"\s*:\s*\[')
+space_pattern = re.compile(r'[\s,]*')
+
+class LazyWorks(Works):
+  '''
+  Habanero: lazy response class
+
+  Works response that keeps the raw response body, and only decodes what
+  is used: `total_results()` and `items_per_page()` are read from the raw
+  body, `items()` decodes one work at a time as it's iterated, and the rest
+  decode the whole body the first time they're called.
+
+  `items()` decodes with the standard library, since finding where each
+  work ends takes a decoder, and doesn't use a faster backend set with
+  :func:`~habanero.set_json_backend`. It pays off when only some works are
+  read: reading all of them this way is slower than decoding the whole
+  body with orjson (in `benchmarks/bench_json.py` pages, about 80 ms
+  against 40 ms for 1000 works), so `works()` and `links()` decode the
+  whole body, as does `items()` once it has been decoded.
+
+  Usage::
+
+      from habanero import Crossref
+      cr = Crossref(lazy = True)
+      res = cr.works(query = "ecology", limit = 1000)
+      res.total_results()
+      for x in res.items():
+          print(x.doi, x.title)
+          break
+  '''
+  def __init__(self, body):
+    self.body = body
+    self._text = None
+    self._result = None
+
+  def __repr__(self):
+    return "<%s %s bytes>" % (type(self).__name__, len(self.body))
+
+  @property
+  def result(self):
+    if self._result is None:
+      self._result = loads(self.body)
+    return self._result
+
+  @property
+  def text(self):
+    if self._text is None:
+      self._text = self.body.decode('utf-8')
+    return self._text
+
+  def total_results(self):
+    # imported here, as request_class imports this module
+    from .request_class import peek_page
+    total = peek_page(self.body)[1]
+    # None for a single work
+    return self.result['message'].get('total-results') if total is None else total
+
+  def items_per_page(self):
+    from .request_class import peek_page
+    per_page = peek_page(self.body)[2]
+    return self.result['message'].get('items-per-page') if per_page is None else per_page
+
+  def items(self):
+    '''
+    Generator of works, as :class:`~habanero.response.Work` records,
+    decoded one at a time
+    '''
+    if self._result is not None:
+      for z in self._result['message']['items']:
+        yield Work(z)
+      return
+    text = self.text
+    m = items_pattern.search(text)
+    if m is None:
+      return
+    decoder = json.JSONDecoder()
+    pos = m.end()
+    while True:
+      pos = space_pattern.match(text, pos).end()
+      if pos >= len(text) or text[pos] == ']':
+        return
+      item, pos = decoder.raw_decode(text, pos)
+      yield Work(item)
@@ -0,0 +1,41 @@
+import re
+
+# fields of a work that can be selected, from
+# https://github.com/CrossRef/rest-api-doc#elements-for-select
+work_fields = [
+  'abstract', 'accepted', 'alternative-id', 'approved', 'archive',
+  'article-number', 'assertion', 'author', 'chair', 'clinical-trial-number',
+  'container-title', 'content-created', 'content-domain', 'created',
+  'degree', 'deposited', 'DOI', 'editor', 'event', 'funder', 'group-title',
+  'indexed', 'is-referenced-by-count', 'ISBN', 'ISSN', 'issn-type',
+  'issue', 'issued', 'license', 'link', 'member', 'original-title',
+  'page', 'posted', 'prefix', 'published', 'published-online',
+  'published-print', 'publisher', 'publisher-location', 'reference',
+  'reference-count', 'references-count', 'relation', 'score',
+  'short-container-title', 'short-title', 'standards-body', 'subject',
+  'subtitle', 'title', 'translator', 'type', 'update-policy', 'update-to',
+  'updated-by', 'URL', 'volume'
+]
+
+_lookup = dict((z.lower(), z) for z in work_fields)
+
+def select_handler(x = None):
+  '''
+  Turn a list (or comma separated string) of work fields into the
+  `select` query parameter, e.g., ['DOI', 'container_title'] to
+  "DOI,container-title". Underscores may be used for dashes, and
+  case is ignored.
+  '''
+  if(x.__class__.__name__ == 'NoneType'):
+    return None
+  if(x.__class__.__name__ == 'str'):
+    x = x.split(',')
+  out = []
+  for z in x:
+    name = re.sub("_", "-", z.strip()).lower()
+    if name not in _lookup:
+      raise ValueError("'%s' is not a field that can be selected, must be one of %s" %
+        (z, ', '.join(work_fields)))
+    if _lookup[name] not in out:
+      out.append(_lookup[name])
+  return ','.join(out)
@@ -0,0 +1,190 @@
+import re
+import time
+import random
+import threading
+from email.utils import parsedate_tz, mktime_tz
+import requests
+from requests.adapters import HTTPAdapter
+try:
+  from urllib.parse import urlparse
+except ImportError:
+  from urlparse import urlparse
+
+class TokenBucket(object):
+  '''
+  Token bucket allowing `rate` requests per second, in bursts of up to
+  `capacity`. With no rate set, requests are not limited.
+  '''
+  def __init__(self, rate = None, capacity = None):
+    self.rate = rate
+    self.capacity = capacity or rate
+    self.tokens = self.capacity
+    self.updated = time.time()
+    self._lock = threading.Lock()
+
+  def set_rate(self, rate, capacity = None):
+    with self._lock:
+      if self.rate is None:
+        self.tokens = capacity or rate
+      self.rate = rate
+      self.capacity = capacity or rate
+
+  def acquire(self):
+    '''
+    Take a token, sleeping until one is available
+    '''
+    with self._lock:
+      if self.rate is None:
+        return
+      now = time.time()
+      self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+      self.updated = now
+      # reserve a token, possibly going into debt, then wait out the debt
+      self.tokens -= 1
+      wait = -self.tokens / self.rate if self.tokens < 0 else 0
+    if wait > 0:
+      time.sleep(wait)
+
+def parse_interval(x):
+  '''
+  Seconds in a rate limit interval such as "1s", "500ms" or "1m"
+  '''
+  m = re.match(r"^\s*([0-9.]+)\s*(ms|s|m|h)?\s*$", x or "")
+  if m is None:
+    return None
+  n = float(m.group(1))
+  return n * {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}[m.group(2) or 's']
+
+def retry_after(resp):
+  '''
+  Seconds to wait from a Retry-After header, either seconds or an HTTP date
+  '''
+  x = resp.headers.get('Retry-After')
+  if x is None:
+    return None
+  if x.strip().isdigit():
+    return int(x)
+  when = parsedate_tz(x)
+  if when is None:
+    return None
+  return max(mktime_tz(when) - time.time(), 0)
+
+class ThrottledAdapter(HTTPAdapter):
+  '''
+  HTTP adapter that throttles requests to the rate a host announces in
+  its X-Rate-Limit-Limit and X-Rate-Limit-Interval headers, and retries
+  429 and 5xx responses with exponential backoff and jitter, honoring
+  Retry-After.
+
+  One bucket is kept per host and shared by every thread using the
+  adapter. Hosts that don't send rate limit headers are not throttled.
+  '''
+  retry_statuses = (429, 500, 502, 503, 504)
+
+  def __init__(self, retries = 3, backoff_factor = 0.5, backoff_max = 60,
+    throttle = True, **kwargs):
+    self.retries = retries
+    self.backoff_factor = backoff_factor
+    self.backoff_max = backoff_max
+    self.throttle = throttle
+    self.buckets = {}
+    self._buckets_lock = threading.Lock()
+    super(ThrottledAdapter, self).__init__(**kwargs)
+
+  def bucket(self, url):
+    host = urlparse(url).netloc
+    with self._buckets_lock:
+      if host not in self.buckets:
+        self.buckets[host] = TokenBucket()
+      return self.buckets[host]
+
+  def update_rate(self, bucket, resp):
+    limit = resp.headers.get('X-Rate-Limit-Limit')
+    interval = parse_interval(resp.headers.get('X-Rate-Limit-Interval'))
+    if limit is None or not interval:
+      return
+    try:
+      limit = int(limit)
+    except ValueError:
+      return
+    if limit > 0 and (bucket.rate != limit / interval or bucket.capacity != limit):
+      bucket.set_rate(limit / interval, limit)
+
+  def backoff(self, attempt):
+    wait = min(self.backoff_factor * (2 ** attempt), self.backoff_max)
+    return wait / 2 + random.uniform(0, wait / 2)
+
+  def send(self, request, **kwargs):
+    bucket = self.bucket(request.url)
+    attempt = 0
+    while True:
+      if self.throttle:
+        bucket.acquire()
+      resp = super(ThrottledAdapter, self).send(request, **kwargs)
+      if self.throttle:
+        self.update_rate(bucket, resp)
+      if resp.status_code not in self.retry_statuses or attempt >= self.retries:
+        return resp
+      wait = retry_after(resp)
+      if wait is None:
+        wait = self.backoff(attempt)
+      resp.close()
+      time.sleep(min(wait, self.backoff_max))
+      attempt += 1
+
+def make_session(pool_connections = 10, pool_maxsize = 10, pool_block = False,
+  keep_alive = True, throttle = True, retries = 3, backoff_factor = 0.5):
+  '''
+  Make a pooled HTTP session
+
+  The session keeps connections alive between requests, so repeated
+  calls to the same host skip the TCP and TLS handshakes. The underlying
+  connection pools are thread-safe, so one session can be shared across
+  threads.
+
+  Requests are throttled to the rate limit Crossref announces in its
+  response headers, shared by all threads using the session, and 429
+  and 5xx responses are retried with exponential backoff.
+
+  :param pool_connections: [Fixnum] Number of hosts to keep connection pools for. Default: 10
+  :param pool_maxsize: [Fixnum] Maximum number of connections kept per host. Default: 10
+  :param pool_block: [Boolean] If true, block when all connections to a host are in
+      use instead of opening a throwaway connection. Default: false
+  :param keep_alive: [Boolean] If false, connections are closed after each request. Default: true
+  :param throttle: [Boolean] Throttle to the X-Rate-Limit headers. Default: true
+  :param retries: [Fixnum] Number of retries for 429 and 5xx responses. Default: 3
+  :param backoff_factor: [Float] Seconds to wait before the first retry, doubled
+      for each retry after, with jitter. A Retry-After header takes precedence. Default: 0.5
+
+  :return: a `requests.Session`
+
+  Usage::
+
+      from habanero import Crossref, make_session
+      sess = make_session(pool_maxsize = 20)
+      cr = Crossref(session = sess)
+      # no throttling or retries
+      sess = make_session(throttle = False, retries = 0)
+  '''
+  sess = requests.Session()
+  adapter = ThrottledAdapter(retries = retries, backoff_factor = backoff_factor,
+    throttle = throttle, pool_connections = pool_connections,
+    pool_maxsize = pool_maxsize, pool_block = pool_block)
+  sess.mount('http://', adapter)
+  sess.mount('https://', adapter)
+  if not keep_alive:
+    sess.headers['Connection'] = 'close'
+  return sess
+
+_session = None
+_session_lock = threading.Lock()
+
+def default_session():
+  '''
+  Shared session used when no session is passed in
+  '''
+  global _session
+  with _session_lock:
+    if _session is None:
+      _session = make_session()
+  return _session
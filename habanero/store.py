@@ -0,0 +1,219 @@
+import sys
+from array import array
+
+from . import tabular
+
+def first_license(x):
+  urls = [ z.get('URL') for z in x.get('license') or [] ]
+  return tabular.first(urls)
+
+# the columns of tabular.to_arrow, and the first license URL
+columns = tabular.columns + [
+  ('license', 'string', first_license),
+]
+
+# string columns unique to each work, kept as utf-8 bytes in one buffer;
+# the other string columns repeat across works, and are dictionary encoded
+text_columns = ('doi', 'title')
+
+# stands in for None in integer columns
+missing = -2 ** 31
+
+class TextColumn(object):
+  '''
+  Strings in one utf-8 buffer, with the offset of the end of each one
+  '''
+  __slots__ = ('buf', 'ends')
+
+  def __init__(self):
+    self.buf = bytearray()
+    self.ends = array('L')
+
+  def append(self, value):
+    if value is not None:
+      self.buf.extend(value.encode('utf-8'))
+    self.ends.append(len(self.buf))
+
+  def __getitem__(self, i):
+    start = 0 if i == 0 else self.ends[i - 1]
+    end = self.ends[i]
+    # an empty string is read back as None
+    return self.buf[start:end].decode('utf-8') if end > start else None
+
+  def nbytes(self):
+    return sys.getsizeof(self.buf) + sys.getsizeof(self.ends)
+
+class EncodedColumn(object):
+  '''
+  Strings as codes into a table of the distinct values, -1 for None
+  '''
+  __slots__ = ('codes', 'values', 'lookup')
+
+  def __init__(self):
+    self.codes = array('i')
+    self.values = []
+    self.lookup = {}
+
+  def append(self, value):
+    if value is None:
+      self.codes.append(-1)
+      return
+    code = self.lookup.get(value)
+    if code is None:
+      code = len(self.values)
+      self.lookup[value] = code
+      self.values.append(value)
+    self.codes.append(code)
+
+  def __getitem__(self, i):
+    code = self.codes[i]
+    return None if code < 0 else self.values[code]
+
+  def nbytes(self):
+    return (sys.getsizeof(self.codes) + sys.getsizeof(self.values) +
+      sys.getsizeof(self.lookup) + sum([ sys.getsizeof(z) for z in self.values ]))
+
+class IntColumn(object):
+  '''
+  32 bit integers, with None stored as `missing`
+  '''
+  __slots__ = ('data',)
+
+  def __init__(self):
+    self.data = array('i')
+
+  def append(self, value):
+    self.data.append(missing if value is None else value)
+
+  def __getitem__(self, i):
+    value = self.data[i]
+    return None if value == missing else value
+
+  def nbytes(self):
+    return sys.getsizeof(self.data)
+
+def make_column(name, type):
+  if type == 'string':
+    return TextColumn() if name in text_columns else EncodedColumn()
+  return IntColumn()
+
+class Record(object):
+  '''
+  Habanero: one work in a :class:`~habanero.store.WorkStore`
+
+  A view of one row, reading its fields from the store's columns, e.g.,
+  `x.doi`, `x.publisher`, `x.issued_year`. Use `as_dict()` for a dict.
+  '''
+  __slots__ = ('_store', '_index')
+
+  def __init__(self, store, index):
+    self._store = store
+    self._index = index
+
+  def __getattr__(self, name):
+    try:
+      col = self._store._columns[name]
+    except KeyError:
+      raise AttributeError(name)
+    return col[self._index]
+
+  def __repr__(self):
+    return "<Record %s>" % self.doi
+
+  def as_dict(self):
+    return dict((name, col[self._index]) for name, col in self._store._columns.items())
+
+class WorkStore(object):
+  '''
+  Habanero: compact in-memory store of works
+
+  Keeps the fields of :func:`~habanero.tabular.to_arrow`, plus the first
+  license URL, for many works in little memory. Each field is a column:
+  DOIs and titles are utf-8 bytes in one buffer, fields that repeat across
+  works (type, publisher, member, container title, license) are codes into
+  a table of their distinct values, and numbers are 32 bit integer arrays.
+  Rows are read back as :class:`~habanero.store.Record` views.
+
+  Only these fields are kept, not the rest of each work. A work takes
+  about 60 bytes, plus the length of its DOI and title in utf-8, and the
+  distinct values of the encoded fields. `benchmarks/bench_store.py`
+  measures 117 bytes a work for 100,000 synthetic works (with 20 character
+  DOIs and 30 character titles), against 14,100 bytes for the same works
+  as decoded dicts. With typical 100 character titles, 2 million works
+  take about 400 MB.
+
+  Usage::
+
+      from habanero import Crossref, WorkStore
+      cr = Crossref()
+      store = WorkStore()
+      for x in cr.works_iter(query = "ecology", limit = 1000, cursor_max = 100000):
+          store.append(x)
+      # or from one response
+      cr = Crossref(lazy = True)
+      store.extend(cr.works(query = "ecology", limit = 1000).items())
+      # or
+      store = cr.works(query = "ecology", limit = 1000).to_store()
+      len(store)
+      store[0].doi
+      store.column('publisher')
+      store.nbytes() / len(store)
+  '''
+  def __init__(self, items = None):
+    self._columns = dict((name, make_column(name, type)) for name, type, _ in columns)
+    self._count = 0
+    if items is not None:
+      self.extend(items)
+
+  def __repr__(self):
+    return "<%s %s works>" % (type(self).__name__, self._count)
+
+  def __len__(self):
+    return self._count
+
+  def __getitem__(self, i):
+    if i < 0:
+      i += self._count
+    if i < 0 or i >= self._count:
+      raise IndexError("WorkStore index out of range")
+    return Record(self, i)
+
+  def __iter__(self):
+    for i in range(self._count):
+      yield Record(self, i)
+
+  def append(self, item):
+    '''
+    Add a work, a dict or a :class:`~habanero.response.Work`
+    '''
+    item = getattr(item, 'data', item)
+    for name, _, get in columns:
+      self._columns[name].append(get(item))
+    self._count += 1
+
+  def extend(self, items):
+    for item in items:
+      self.append(item)
+
+  def column(self, name):
+    '''
+    All values of one field, as a list
+    '''
+    col = self._columns[name]
+    return [ col[i] for i in range(self._count) ]
+
+  def nbytes(self):
+    '''
+    Approximate memory used by the store, in bytes
+    '''
+    return sum([ z.nbytes() for z in self._columns.values() ])
+
+  def to_arrow(self):
+    '''
+    The works as a `pyarrow.Table`, with the columns of
+    :func:`~habanero.tabular.to_arrow`, plus `license`
+    '''
+    pyarrow = tabular.import_pyarrow()
+    return pyarrow.Table.from_pydict(
+      dict((name, self.column(name)) for name, _, _ in columns),
+      schema = pyarrow.schema([ (name, getattr(pyarrow, type)()) for name, type, _ in columns ]))
@@ -0,0 +1,137 @@
+def first(x):
+  if x.__class__ in (list, tuple):
+    return x[0] if len(x) > 0 else None
+  return x
+
+def date_part(x, i):
+  try:
+    return int(x['date-parts'][0][i])
+  except (KeyError, IndexError, TypeError, ValueError):
+    return None
+
+def count(x):
+  return None if x is None else len(x)
+
+# name, arrow type name, and how to get it from a work
+columns = [
+  ('doi', 'string', lambda z: z.get('DOI')),
+  ('title', 'string', lambda z: first(z.get('title'))),
+  ('container_title', 'string', lambda z: first(z.get('container-title'))),
+  ('issued_year', 'int32', lambda z: date_part(z.get('issued'), 0)),
+  ('issued_month', 'int32', lambda z: date_part(z.get('issued'), 1)),
+  ('issued_day', 'int32', lambda z: date_part(z.get('issued'), 2)),
+  ('type', 'string', lambda z: z.get('type')),
+  ('member', 'string', lambda z: z.get('member')),
+  ('publisher', 'string', lambda z: z.get('publisher')),
+  ('author_count', 'int32', lambda z: count(z.get('author'))),
+  ('reference_count', 'int32', lambda z: z.get('reference-count', z.get('references-count'))),
+]
+
+def flatten(items):
+  '''
+  Flatten works (dicts) into a dict of column name to list of values
+  '''
+  cols = dict((name, []) for name, _, _ in columns)
+  for item in items:
+    for name, _, get in columns:
+      cols[name].append(get(item))
+  return cols
+
+# pyarrow and pandas are optional, and slow to import, so only imported when used
+def import_pyarrow():
+  try:
+    import pyarrow
+    import pyarrow.parquet
+  except ImportError:
+    raise ImportError("Arrow and Parquet output need pyarrow, install with `pip install pyarrow`")
+  return pyarrow
+
+def schema():
+  pyarrow = import_pyarrow()
+  return pyarrow.schema([ (name, getattr(pyarrow, type)()) for name, type, _ in columns ])
+
+def to_arrow(items):
+  '''
+  Works as a `pyarrow.Table`, one row per work, with typed columns for
+  DOI, title, container title, issued date parts, type, member, publisher,
+  and author and reference counts
+  '''
+  pyarrow = import_pyarrow()
+  return pyarrow.Table.from_pydict(flatten(items), schema = schema())
+
+def to_pandas(items):
+  '''
+  Works as a `pandas.DataFrame`, with the same columns as `to_arrow`
+  '''
+  try:
+    import pandas
+  except ImportError:
+    raise ImportError("DataFrame output needs pandas, install with `pip install pandas`")
+  try:
+    return to_arrow(items).to_pandas()
+  except ImportError:
+    return pandas.DataFrame(flatten(items), columns = [ z[0] for z in columns ])
+
+class ParquetWriter(object):
+  '''
+  Habanero: streaming Parquet writer
+
+  Writes works to a Parquet file as they arrive, flattened to the columns
+  of :func:`~habanero.tabular.to_arrow`, one row group per `batch_size`
+  works, so a cursor harvest of any size can be saved in bounded memory.
+
+  Usage::
+
+      from habanero import Crossref, ParquetWriter
+      cr = Crossref()
+      with ParquetWriter("works.parquet") as out:
+          for x in cr.works_iter(query = "ecology", limit = 1000, cursor_max = 100000):
+              out.write(x)
+      out.count
+  '''
+  def __init__(self, path, batch_size = 10000, compression = 'snappy'):
+    pyarrow = import_pyarrow()
+    self.path = path
+    self.batch_size = batch_size
+    self.count = 0
+    self._batch = []
+    self._writer = pyarrow.parquet.ParquetWriter(path, schema(), compression = compression)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+  def write(self, item):
+    self._batch.append(item)
+    if len(self._batch) >= self.batch_size:
+      self.flush()
+
+  def flush(self):
+    if self._batch:
+      self._writer.write_table(to_arrow(self._batch))
+      self.count += len(self._batch)
+      self._batch = []
+
+  def close(self):
+    if self._writer is not None:
+      self.flush()
+      self._writer.close()
+      self._writer = None
+
+def write_parquet(items, path, batch_size = 10000, compression = 'snappy'):
+  '''
+  Write works from any iterable (e.g., :func:`~habanero.Crossref.works_iter`)
+  to a Parquet file, in batches, returning the number written
+
+  Usage::
+
+      from habanero import Crossref, write_parquet
+      cr = Crossref()
+      write_parquet(cr.works_iter(query = "ecology", cursor_max = 10000), "works.parquet")
+  '''
+  with ParquetWriter(path, batch_size, compression) as out:
+    for item in items:
+      out.write(item)
+  return out.count
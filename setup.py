@@ -21,6 +21,8 @@ setup(
   license          = 'MIT',
   packages         = find_packages(exclude=['test-*']),
   install_requires = ['requests>=2.7.0'],
+  extras_require   = {'async': ['aiohttp'], 'csl': ['citeproc-py'],
+                      'arrow': ['pyarrow'], 'pandas': ['pandas', 'pyarrow']},
   classifiers      = (
     'Development Status :: 3 - Alpha',
     'Intended Audience :: Science/Research',
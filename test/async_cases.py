@@ -0,0 +1,40 @@
+"""Tests for AsyncCrossref, imported by test-async.py where they can run
+
+Kept apart since `async def` is a syntax error before Python 3.5
+"""
+import os
+import asyncio
+from habanero import AsyncCrossref
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+async def with_client(fun):
+    async with AsyncCrossref() as cr:
+        return await fun(cr)
+
+def test_async_works_with_one_id():
+    "async works - param: ids, one DOI"
+    res = run(with_client(lambda cr: cr.works(ids = '10.1371/journal.pone.0033693')))
+    assert dict == res.__class__
+    assert 'work' == res['message-type']
+
+def test_async_works_with_many_ids():
+    "async works - param: ids, many DOIs in input order"
+    dois = ['10.1016/j.neurobiolaging.2010.03.024', '10.1002/jor.1100150407',
+    '10.1038/srep16696']
+    res = run(with_client(lambda cr: cr.works(ids = dois, concurrency = 2)))
+    assert list == res.__class__
+    assert dois == [ x['message']['DOI'] for x in res ]
+
+def test_async_cursor_max():
+    "async works - cursor_max works"
+    res = run(with_client(lambda cr: cr.works(query = "widget", cursor = "*", cursor_max = 40)))
+    items = [ item for z in res for item in z['message']['items'] ]
+    assert 40 == len(items)
+
+def test_async_registration_agency():
+    "async registration_agency - basic test"
+    res = run(with_client(lambda cr: cr.registration_agency('10.1371/journal.pone.0033693')))
+    assert list == res.__class__
+    assert 'crossref' == res[0].lower()
@@ -0,0 +1,12 @@
+"""Tests for AsyncCrossref"""
+import sys
+from unittest import SkipTest
+
+if sys.version_info < (3, 5):
+    raise SkipTest("AsyncCrossref needs Python 3.5 or later")
+try:
+    import aiohttp
+except ImportError:
+    raise SkipTest("AsyncCrossref needs aiohttp")
+
+from async_cases import *
@@ -0,0 +1,155 @@
+"""Tests for response caches"""
+import os
+import time
+import tempfile
+from habanero import Crossref, SQLiteCache, LRUCache, CNCache
+from habanero.cache import cache_key
+
+def make_cache(**kwargs):
+    return SQLiteCache(os.path.join(tempfile.mkdtemp(), "cache.sqlite"), **kwargs)
+
+def test_cache_key_filter_order():
+    "cache_key - filter order doesn't matter"
+    a = cache_key("http://api.crossref.org/works", {'filter': 'type:journal-article,has-full-text:true'})
+    b = cache_key("http://api.crossref.org/works/", {'filter': 'has-full-text:true,type:journal-article'})
+    assert a == b
+
+def test_cache_route_ttls():
+    "SQLiteCache - TTLs by route, and for searches"
+    cache = make_cache(ttl = 5, route_ttls = {'/members': 10})
+    assert 10 == cache.ttl_for("http://api.crossref.org/members/98")
+    assert 5 == cache.ttl_for("http://api.crossref.org/journals")
+    assert cache.ttl_for("http://api.crossref.org/works", {'query': 'x'}) < cache.ttl_for("http://api.crossref.org/works/10.1/x")
+
+def test_cache_get_set_expire():
+    "SQLiteCache - get, set and expiry"
+    cache = make_cache(ttl = -1, route_ttls = {'/types': 60})
+    cache.set("http://api.crossref.org/types", None, b'{"a": 1}')
+    cache.set("http://api.crossref.org/members", None, b'{"b": 1}')
+    assert b'{"a": 1}' == cache.get("http://api.crossref.org/types")
+    assert None == cache.get("http://api.crossref.org/members")
+
+def test_cache_validators():
+    "SQLiteCache - expired entries kept with validators, and renewed"
+    cache = make_cache(ttl = -1, route_ttls = {'/members': -1})
+    cache.set("http://x/members/98", None, b'{"a": 1}', '"abc"', 'Wed, 21 Oct 2015 07:28:00 GMT')
+    assert None == cache.get("http://x/members/98")
+    assert (b'{"a": 1}', '"abc"', 'Wed, 21 Oct 2015 07:28:00 GMT', False) == cache.lookup("http://x/members/98")
+    cache.route_ttls['/members'] = 60
+    cache.renew("http://x/members/98")
+    assert b'{"a": 1}' == cache.get("http://x/members/98")
+
+def test_crossref_cache_revalidates():
+    "Crossref - param: cache, expired entries revalidated"
+    cache = make_cache(route_ttls = {'/works': -1})
+    cr = Crossref(cache = cache)
+    a = cr.works(ids = '10.1371/journal.pone.0033693')
+    b = cr.works(ids = '10.1371/journal.pone.0033693')
+    assert a == b
+
+def test_cache_evicts_least_recently_used():
+    "SQLiteCache - param: max_size"
+    cache = make_cache(max_size = 25)
+    cache.set("http://x/works/1", None, b'0123456789')
+    cache.set("http://x/works/2", None, b'0123456789')
+    cache.get("http://x/works/1")
+    cache.set("http://x/works/3", None, b'0123456789')
+    assert None == cache.get("http://x/works/2")
+    assert b'0123456789' == cache.get("http://x/works/1")
+    assert 20 == cache.size()
+
+def test_crossref_cache_hits_count_as_used():
+    "Crossref - param: cache, reads from the cache keep entries from eviction"
+    cache = make_cache(max_size = 250)
+    body = b'{"status": "ok", "message-type": "work", "message": {"DOI": "10.1/a"}}'
+    base = "http://127.0.0.1:9"
+    cache.set(base + "/works/10.1/a", None, body.ljust(100))
+    time.sleep(0.01)
+    cache.set(base + "/works/10.1/b", None, body.ljust(100))
+    time.sleep(0.01)
+    res = Crossref(base_url = base, cache = cache).works(ids = '10.1/a')
+    assert '10.1/a' == res['message']['DOI']
+    time.sleep(0.01)
+    cache.set(base + "/works/10.1/z", None, body.ljust(100))
+    assert cache.get(base + "/works/10.1/a") is not None
+    assert None == cache.get(base + "/works/10.1/b")
+
+def test_crossref_cache():
+    "Crossref - param: cache, second request served from cache"
+    cache = make_cache()
+    cr = Crossref(cache = cache)
+    res1 = cr.works(ids = '10.1371/journal.pone.0033693')
+    assert cache.get("http://api.crossref.org/works/10.1371/journal.pone.0033693") is not None
+    res2 = cr.works(ids = '10.1371/journal.pone.0033693')
+    assert res1 == res2
+
+def test_lru_cache():
+    "LRUCache - bounded, counts hits and misses"
+    memo = LRUCache(maxsize = 2)
+    memo.set('a', 1)
+    memo.set('b', 2)
+    assert 1 == memo.get('a')
+    memo.set('c', 3)
+    assert None == memo.get('b')
+    assert {'hits': 1, 'misses': 1, 'size': 2, 'maxsize': 2} == memo.info()
+    assert memo.invalidate('a')
+    assert 'a' not in memo
+
+def test_lru_cache_ttl():
+    "LRUCache - param: ttl, entries expire"
+    memo = LRUCache(ttl = 0.05)
+    memo.set('a', 1)
+    assert 1 == memo.get('a')
+    time.sleep(0.1)
+    assert 'a' not in memo
+    assert None == memo.get('a')
+
+def test_crossref_memo():
+    "Crossref - param: memo, lookups by id memoized"
+    memo = LRUCache()
+    cr = Crossref(memo = memo)
+    cr.works(ids = '10.1371/journal.pone.0033693')
+    cr.works(ids = '10.1371/journal.pone.0033693')
+    assert 1 == memo.info()['hits']
+    assert memo.invalidate("http://api.crossref.org/works/10.1371/journal.pone.0033693")
+
+def test_cn_cache():
+    "CNCache - keyed by doi, format, style and locale, on disk"
+    path = os.path.join(tempfile.mkdtemp(), "cn.sqlite")
+    cache = CNCache(path)
+    cache.set('10.1/A', 'bibtex', 'apa', 'en-US', 200, u'@article{a}')
+    cache.set('10.1/a', 'text', 'apa', 'en-US', 200, u'A. (2000)')
+    cache.set('10.1/b', 'bibtex', None, None, 500, u'oops')
+    # style and locale only matter for text
+    assert (200, u'@article{a}') == cache.get('10.1/a', 'bibtex', 'harvard3', 'de-DE')
+    assert None == cache.get('10.1/a', 'text', 'harvard3', 'en-US')
+    assert None == cache.get('10.1/b', 'bibtex')
+    assert (200, u'A. (2000)') == CNCache(path).get('10.1/a', 'text', 'apa', 'en-US')
+
+def test_cn_cache_negative_ttl():
+    "CNCache - param: negative_ttl, not found results expire"
+    cache = CNCache(negative_ttl = 0.05)
+    cache.set('10.1/gone', 'bibtex', None, None, 404, u'DOI Not Found')
+    assert (404, u'DOI Not Found') == cache.get('10.1/gone', 'bibtex')
+    time.sleep(0.1)
+    assert None == cache.get('10.1/gone', 'bibtex')
+
+def test_content_negotiation_cache():
+    "content negotiation - param: cache"
+    from habanero import cn
+    cache = CNCache()
+    res = cn.content_negotiation(ids = '10.1126/science.169.3946.635', cache = cache)
+    assert res == cache.get('10.1126/science.169.3946.635', 'bibtex')[1]
+
+def test_cache_running_size():
+    "SQLiteCache - running total of body sizes kept through set, replace, delete and clear"
+    cache = make_cache(max_size = 100)
+    cache.set("http://x/works/1", None, b'0123456789')
+    cache.set("http://x/works/2", None, b'0123456789')
+    cache.set("http://x/works/1", None, b'01234')
+    assert 15 == cache._total == cache.size()
+    cache.delete("http://x/works/2")
+    assert 5 == cache._total == cache.size()
+    assert 5 == SQLiteCache(cache.path)._total
+    cache.clear()
+    assert 0 == cache._total == cache.size()
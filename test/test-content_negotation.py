@@ -1,5 +1,6 @@
 """Tests for content_negotation"""
 import os
+from unittest import SkipTest
 from habanero import cn
 
 bibtex = '@article{Frank_1970,\n\tdoi = {10.1126/science.169.3946.635},\n\turl = {http://dx.doi.org/10.1126/science.169.3946.635},\n\tyear = 1970,\n\tmonth = {aug},\n\tpublisher = {American Association for the Advancement of Science ({AAAS})},\n\tvolume = {169},\n\tnumber = {3946},\n\tpages = {635--641},\n\tauthor = {H. S. Frank},\n\ttitle = {The Structure of Ordinary Water: New data and interpretations are yielding new insights into this fascinating substance},\n\tjournal = {Science}\n}'
@@ -14,3 +15,70 @@ def test_content_negotiation_citeproc_json():
     "content negotiation - citeproc-json"
     res = cn.content_negotiation(ids = '10.1126/science.169.3946.635', format = "citeproc-json")
     assert str == str(res).__class__
+
+dois = ['10.1126/science.169.3946.635', '10.1371/journal.pone.0033693']
+
+def test_content_negotiation_concurrency():
+    "content negotiation - param: concurrency, results in input order"
+    res = cn.content_negotiation(ids = dois, concurrency = 2)
+    assert list == res.__class__
+    assert 2 == len(res)
+    assert dois[0] in res[0]
+
+def test_content_negotiation_as_completed():
+    "content negotiation - param: as_completed"
+    res = dict(cn.content_negotiation(ids = dois, concurrency = 2, as_completed = True))
+    assert set(dois) == set(res.keys())
+
+def test_content_negotiation_file():
+    "content negotiation - param: file"
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), "refs.bib")
+    res = cn.content_negotiation(ids = dois, concurrency = 2, file = path)
+    assert {'written': 2, 'failed': []} == res
+    assert 2 == open(path).read().count("@")
+
+def test_write_bodies_skips_errors():
+    "write_bodies - error responses left out of the file, and reported"
+    import io
+    from habanero.cnrequest import write_bodies
+    buf = io.StringIO()
+    res = write_bodies(buf, ['10.1/a', '10.1/bad', '10.1/c'],
+        [(200, u'@article{a}'), (404, u'DOI Not Found'), (200, u'@article{c}\n')])
+    assert {'written': 2, 'failed': ['10.1/bad']} == res
+    assert u'@article{a}\n\n@article{c}\n' == buf.getvalue()
+
+def test_render_citations():
+    "render_citations - renders cached citeproc-json locally"
+    try:
+        import citeproc
+    except ImportError:
+        raise SkipTest("rendering citations needs citeproc-py")
+    from habanero import CNCache
+    cache = CNCache()
+    cache.set('10.1126/science.169.3946.635', 'citeproc-json', None, None, 200, cjson)
+    res = cn.render_citations('10.1126/science.169.3946.635',
+        styles = ['harvard-cite-them-right'], cache = cache)
+    assert dict == res.__class__
+    assert res['harvard-cite-them-right'].startswith("Frank, H.S. (1970)")
+
+def test_load_style_reloads_changed_file():
+    "load_style - parsed again when the style file changes"
+    try:
+        import citeproc
+    except ImportError:
+        raise SkipTest("rendering citations needs citeproc-py")
+    import time
+    import shutil
+    import tempfile
+    from habanero.cn.render import load_style
+    src = os.path.join(os.path.dirname(citeproc.__file__), 'data', 'styles',
+        'harvard-cite-them-right.csl')
+    style_dir = tempfile.mkdtemp()
+    path = os.path.join(style_dir, 'mine.csl')
+    shutil.copy(src, path)
+    style = load_style('mine', 'en-US', style_dir)
+    assert style is load_style('mine', 'en-US', style_dir)
+    later = time.time() + 10
+    os.utime(path, (later, later))
+    assert style is not load_style('mine', 'en-US', style_dir)
@@ -0,0 +1,27 @@
+"""Tests for counts.citation_count"""
+from nose.tools import *
+from habanero import counts, RequestError
+from habanero.counts.counts import parse_count
+
+def test_citation_count():
+    "citation_count - basic test"
+    res = counts.citation_count(doi = "10.1371/journal.pone.0042793")
+    assert int == res.__class__
+
+def test_citation_count_many():
+    "citation_count - many DOIs, failures recorded"
+    dois = ["10.1371/journal.pone.0042793", "10.1016/j.fbr.2012"]
+    res = counts.citation_count(doi = dois, concurrency = 2)
+    assert dict == res.__class__
+    assert int == res['counts'][dois[0]].__class__
+    assert dois[1] in res['errors']
+
+def test_parse_count():
+    "parse_count - reads fl_count from the query element"
+    xml = b'<?xml version="1.0"?><crossref_result xmlns="http://www.crossref.org/qrschema/2.0"><query_result><body><query status="resolved" fl_count="12"><doi>10.1/a</doi></query></body></query_result></crossref_result>'
+    assert 12 == parse_count(xml)
+
+@raises(RequestError)
+def test_parse_count_unresolved():
+    "parse_count - fails well for unresolved DOIs"
+    parse_count(b'<crossref_result><query_result><body><query status="unresolved"/></body></query_result></crossref_result>')
@@ -0,0 +1,24 @@
+"""Tests for csl_styles"""
+import os
+import json
+import time
+import tempfile
+from habanero import cn
+
+def test_csl_styles():
+    "csl_styles - basic test, snapshot saved"
+    path = os.path.join(tempfile.mkdtemp(), "styles.json")
+    res = cn.csl_styles(path = path)
+    assert list == res.__class__
+    assert "apa" in res
+    snap = json.load(open(path))
+    assert res == snap['styles']
+    assert 40 == len(snap['sha'])
+
+def test_csl_styles_snapshot():
+    "csl_styles - param: max_age, fresh snapshot used without requests"
+    path = os.path.join(tempfile.mkdtemp(), "styles.json")
+    with open(path, "w") as f:
+        json.dump({'sha': 'abc', 'etag': None, 'checked': time.time(),
+          'styles': ['apa', 'nature']}, f)
+    assert ['apa', 'nature'] == cn.csl_styles(path = path)
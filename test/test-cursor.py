@@ -37,3 +37,31 @@ def test_cursor_fails_cursor_value():
 def test_cursor_fails_cursor_max():
     "cursor works - fails when cursor value not allowed"
     cr.works(query = "widget", cursor = "*", cursor_max = "thing")
+
+def test_works_iter():
+    "works_iter - yields items lazily, honors cursor_max"
+    res = cr.works_iter(query = "widget", cursor_max = 60)
+    assert 'generator' == res.__class__.__name__
+    items = list(res)
+    assert 60 == len(items)
+    assert dict == items[0].__class__
+
+def test_works_iter_pages():
+    "works_iter - param: items, yields pages"
+    pages = list(cr.works_iter(query = "widget", cursor_max = 40, items = False))
+    assert 2 == len(pages)
+    assert 'work-list' == pages[0]['message-type']
+
+def test_members_works_iter():
+    "members_works_iter - basic test"
+    items = list(cr.members_works_iter(98, cursor_max = 40))
+    assert 40 == len(items)
+
+def test_cursor_pipeline():
+    "cursor works - param: pipeline, same results as sequential paging"
+    res1 = cr.works(query = "widget", cursor = "*", cursor_max = 60, sort = "deposited")
+    res2 = cr.works(query = "widget", cursor = "*", cursor_max = 60, sort = "deposited", pipeline = True)
+    dois1 = [ x['DOI'] for z in res1 for x in z['message']['items'] ]
+    dois2 = [ x['DOI'] for z in res2 for x in z['message']['items'] ]
+    assert 60 == len(dois2)
+    assert dois1 == dois2
@@ -0,0 +1,25 @@
+"""Tests for the JSON decoder backends"""
+from nose.tools import *
+from habanero import set_json_backend, get_json_backend
+from habanero.decoder import loads
+
+body = b'{"status": "ok", "message": {"items": [{"DOI": "10.1/\\u00e9"}]}}'
+
+def test_json_backend_stdlib():
+    "set_json_backend - stdlib json decodes bytes and text"
+    assert 'json' == set_json_backend('json')
+    assert 'json' == get_json_backend()
+    assert u'10.1/é' == loads(body)['message']['items'][0]['DOI']
+    assert loads(body) == loads(body.decode('utf-8'))
+    set_json_backend()
+
+def test_json_backend_auto():
+    "set_json_backend - auto picks an installed backend"
+    name = set_json_backend('auto')
+    assert name == get_json_backend()
+    assert 'ok' == loads(body)['status']
+
+@raises(ValueError)
+def test_json_backend_fails_well():
+    "set_json_backend - fails well"
+    set_json_backend('yaml')
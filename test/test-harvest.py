@@ -0,0 +1,106 @@
+"""Tests for Crossref.works_harvest"""
+import os
+from nose.tools import *
+from habanero import Crossref
+cr = Crossref()
+
+def test_works_harvest():
+    "works_harvest - date slices, deduplicated"
+    filt = {'from_index_date': '2016-01-01', 'until_index_date': '2016-01-02'}
+    res = cr.works_harvest(filter = filt, partitions = 3, cursor_max = 300)
+    assert 'generator' == res.__class__.__name__
+    dois = [ x['DOI'] for x in res ]
+    assert 300 == len(dois)
+    assert len(dois) == len(set(dois))
+
+def test_works_harvest_prefix():
+    "works_harvest - param: partition_by, one slice per prefix"
+    res = cr.works_harvest(partitions = ['10.1016', '10.1371'], partition_by = "prefix",
+      limit = 50, cursor_max = 100)
+    prefixes = set([ x['DOI'].split('/')[0] for x in res ])
+    assert prefixes <= set(['10.1016', '10.1371'])
+
+@raises(ValueError)
+def test_works_harvest_bad_partition_by():
+    "works_harvest - fails with unknown partition_by"
+    cr.works_harvest(partition_by = "title")
+
+@raises(ValueError)
+def test_works_harvest_prefix_needs_list():
+    "works_harvest - fails when partitioning by prefix without a list"
+    cr.works_harvest(partition_by = "prefix")
+
+def test_parse_date_until():
+    "parse_date - partial until dates cover the whole period"
+    import datetime
+    from habanero.harvest import parse_date
+    assert datetime.date(2015, 1, 1) == parse_date('2015')
+    assert datetime.date(2015, 12, 31) == parse_date('2015', end = True)
+    assert datetime.date(2016, 2, 29) == parse_date('2016-02', end = True)
+    assert datetime.date(2015, 12, 31) == parse_date('2015-12', end = True)
+    assert datetime.date(2015, 3, 4) == parse_date('2015-03-04', end = True)
+
+def test_works_harvest_jsonl():
+    "works_harvest_jsonl - files and checkpoint, resumes without requests"
+    import json
+    import tempfile
+    out = tempfile.mkdtemp()
+    filt = {'prefix': '10.7717', 'from_index_date': '2016-01-01', 'until_index_date': '2016-01-03'}
+    res = cr.works_harvest_jsonl(out, filter = filt, partitions = 2, max_records = 50)
+    assert 2 == res['slices']
+    lines = [ l for f in res['files'] for l in open(f) ]
+    assert res['count'] == len(lines)
+    state = json.load(open(os.path.join(out, "checkpoint.json")))
+    assert 2 == len(state['done'])
+    assert res == cr.works_harvest_jsonl(out, filter = filt, partitions = 2, max_records = 50)
+
+def test_works_sync():
+    "works_sync - upserts since a date, then since the stored watermark"
+    import json
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), "sync.json")
+    filt = {'prefix': '10.7717', 'from_index_date': '2016-01-01'}
+    res = cr.works_sync(filter = filt, state_path = path, limit = 100)
+    assert 'generator' == res.__class__.__name__
+    assert not os.path.exists(path)
+    dois = [ x['DOI'] for x in res ]
+    assert len(dois) == len(set(dois))
+    state = json.load(open(path))
+    assert ['sync.json'] == os.listdir(os.path.dirname(path))
+    assert len(dois) == state['count']
+    assert '2016-01-01' == state['since']
+    again = list(cr.works_sync(filter = filt, state_path = path, limit = 100))
+    assert state['watermark'] == json.load(open(path))['since']
+
+@raises(ValueError)
+def test_works_sync_changed_filter():
+    "works_sync - fails when the filter doesn't match the stored state"
+    import tempfile
+    path = os.path.join(tempfile.mkdtemp(), "sync.json")
+    list(cr.works_sync(filter = {'prefix': '10.7717', 'from_index_date': '2030-01-01'},
+      state_path = path))
+    cr.works_sync(filter = {'prefix': '10.1016'}, state_path = path)
+
+def test_write_json_replaces():
+    "write_json - replaces the file, leaves no temporary file"
+    import json
+    import tempfile
+    from habanero.harvest import write_json
+    path = os.path.join(tempfile.mkdtemp(), "checkpoint.json")
+    write_json(path, {'a': 1})
+    write_json(path, {'a': 2})
+    assert {'a': 2} == json.load(open(path))
+    assert ['checkpoint.json'] == os.listdir(os.path.dirname(path))
+
+def test_utc_now():
+    "utc_now - the time in UTC, without deprecation warnings"
+    import warnings
+    import datetime
+    from habanero.harvest import utc_now
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        now = utc_now()
+    assert datetime.datetime == now.__class__
+    import time
+    import calendar
+    assert abs(calendar.timegm(now.utctimetuple()) - time.time()) < 5
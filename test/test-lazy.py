@@ -0,0 +1,62 @@
+"""Tests for lazily decoded responses"""
+import json
+from habanero import Crossref
+from habanero.response import LazyWorks, Work
+from habanero.noworks import LazyNoWorks
+
+items = [
+  {'DOI': '10.1/a', 'title': ['A, "quoted" ]'], 'type': 'journal-article',
+   'issued': {'date-parts': [[2012, 3]]}, 'link': [{'URL': 'http://x'}]},
+  {'DOI': '10.1/b', 'title': []},
+]
+body = json.dumps({'status': 'ok', 'message-type': 'work-list', 'message-version': '1.0.0',
+  'message': {'facets': {}, 'total-results': 1234, 'items': items,
+  'items-per-page': 2, 'query': {}}}, indent = 1).encode('utf-8')
+
+def test_lazy_works_page():
+    "LazyWorks - total and page size without decoding"
+    res = LazyWorks(body)
+    assert 1234 == res.total_results()
+    assert 2 == res.items_per_page()
+    assert res._result is None
+
+def test_lazy_works_items():
+    "LazyWorks - items decoded one at a time, as Work records"
+    res = LazyWorks(body)
+    out = list(res.items())
+    assert res._result is None
+    assert 2 == len(out)
+    assert Work == out[0].__class__
+    assert '10.1/a' == out[0].doi
+    assert 'A, "quoted" ]' == out[0].title
+    assert None == out[1].title
+    assert [2012, 3] == out[0].issued
+    assert '10.1/b' == out[1]['DOI']
+    assert items == res.works()
+    assert 1 == len(res.links())
+
+def test_lazy_works_result():
+    "LazyWorks - the whole decoded response"
+    res = LazyWorks(body)
+    assert 'ok' == res.status()
+    assert items == res.message()['items']
+    assert ['10.1/a', '10.1/b'] == [ z.doi for z in res.items() ]
+
+def test_lazy_works_single():
+    "LazyWorks - a single work"
+    res = LazyWorks(json.dumps({'status': 'ok', 'message': items[0]}).encode('utf-8'))
+    assert [items[0]] == res.works()
+    assert None == res.total_results()
+    assert None == res.items_per_page()
+
+def test_lazy_noworks():
+    "LazyNoWorks - decoded when used"
+    res = LazyNoWorks(b'{"status": "ok", "message": {"id": 98}}')
+    assert res._result is None
+    assert 98 == res.message()['id']
+
+def test_crossref_lazy():
+    "Crossref - lazy"
+    cr = Crossref(lazy = True)
+    assert cr.lazy
+    assert not Crossref().lazy
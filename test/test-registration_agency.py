@@ -0,0 +1,29 @@
+"""Tests for Crossref.registration_agency"""
+from nose.tools import *
+from habanero import Crossref, LRUCache
+from habanero.agency import doi_prefix, group_by_prefix
+cr = Crossref()
+
+def test_registration_agency():
+    "registration_agency - basic test"
+    res = cr.registration_agency('10.1371/journal.pone.0033693')
+    assert list == res.__class__
+    assert 'crossref' == res[0].lower()
+
+def test_registration_agency_by_prefix():
+    "registration_agency - one lookup per prefix, results in input order"
+    agencies = LRUCache()
+    cr = Crossref(agency_cache = agencies)
+    dois = ['10.1007/12080.1874-1746', '10.5281/zenodo.1000', '10.1007/10452.1573-5125']
+    res = cr.registration_agency(dois, concurrency = 2)
+    assert 3 == len(res)
+    assert res[0] == res[2]
+    assert 'datacite' == res[1].lower()
+    assert 2 == len(agencies)
+
+def test_doi_prefix():
+    "doi_prefix - strips doi: and doi.org"
+    assert '10.1371' == doi_prefix('10.1371/journal.pone.0033693')
+    assert '10.1371' == doi_prefix('https://doi.org/10.1371/journal.pone.0033693')
+    assert '10.5281' == doi_prefix('doi:10.5281/zenodo.1000')
+    assert ['10.1', '10.2'] == list(group_by_prefix(['10.1/a', '10.2/b', '10.1/c']).keys())
@@ -0,0 +1,159 @@
+"""Tests for pooled sessions"""
+import os
+import time
+import requests
+from habanero import Crossref, make_session
+from habanero.session import default_session, ThrottledAdapter, TokenBucket, parse_interval
+from habanero.habanero_utils import make_ua
+
+def test_make_session():
+    "make_session - pool settings passed to the adapter"
+    sess = make_session(pool_connections = 3, pool_maxsize = 7)
+    adapter = sess.get_adapter("https://api.crossref.org")
+    assert requests.Session == sess.__class__
+    assert 3 == adapter._pool_connections
+    assert 7 == adapter._pool_maxsize
+
+def test_crossref_session():
+    "Crossref - param: pool_maxsize, session"
+    cr = Crossref(pool_maxsize = 20)
+    assert 20 == cr.session.get_adapter("http://api.crossref.org")._pool_maxsize
+    sess = make_session()
+    assert sess is Crossref(session = sess).session
+
+def test_default_session_is_shared():
+    "default_session - same session on every call"
+    assert default_session() is default_session()
+
+def test_session_adapter_settings():
+    "make_session - params: throttle, retries, backoff_factor"
+    sess = make_session(throttle = False, retries = 5, backoff_factor = 2)
+    adapter = sess.get_adapter("http://api.crossref.org")
+    assert ThrottledAdapter == adapter.__class__
+    assert False == adapter.throttle
+    assert 5 == adapter.retries
+    assert 2 == adapter.backoff_factor
+
+def test_parse_interval():
+    "parse_interval - X-Rate-Limit-Interval values"
+    assert 1 == parse_interval("1s")
+    assert 0.5 == parse_interval("500ms")
+    assert 60 == parse_interval("1m")
+    assert None == parse_interval("soon")
+
+def test_token_bucket():
+    "TokenBucket - bursts up to capacity, then waits"
+    bucket = TokenBucket()
+    bucket.acquire()
+    bucket.set_rate(100, 2)
+    start = time.time()
+    for i in range(4):
+        bucket.acquire()
+    assert time.time() - start >= 0.015
+
+def test_make_ua():
+    "make_ua - mailto in the User-Agent, api_key as the Plus token"
+    head = make_ua()
+    assert 'mailto' not in head['User-Agent']
+    assert 'Crossref-Plus-API-Token' not in head
+    head = make_ua(mailto = "name@example.com", api_key = "123456")
+    assert head['User-Agent'].endswith("(mailto:name@example.com)")
+    assert "Bearer 123456" == head['Crossref-Plus-API-Token']
+
+def test_crossref_mailto():
+    "Crossref - param: mailto"
+    cr = Crossref(mailto = "name@example.com")
+    assert "name@example.com" == cr.mailto
+
+def stub_response(status, headers):
+    resp = requests.models.Response()
+    resp.status_code = status
+    resp.headers.update(headers)
+    resp._content = b''
+    resp._content_consumed = True
+    return resp
+
+def send_scripted(adapter, responses):
+    from requests.adapters import HTTPAdapter
+    calls = []
+    def send(self, request, **kwargs):
+        calls.append(request.url)
+        return responses[len(calls) - 1]
+    orig = HTTPAdapter.send
+    HTTPAdapter.send = send
+    try:
+        req = requests.Request('GET', 'http://api.crossref.org/works').prepare()
+        return adapter.send(req), calls
+    finally:
+        HTTPAdapter.send = orig
+
+def test_adapter_retry_after():
+    "ThrottledAdapter - retries a 503, honoring Retry-After, and takes the rate from the headers"
+    adapter = ThrottledAdapter(retries = 3, backoff_factor = 30)
+    rate = {'X-Rate-Limit-Limit': '50', 'X-Rate-Limit-Interval': '1s'}
+    start = time.time()
+    resp, calls = send_scripted(adapter, [stub_response(503, dict(rate, **{'Retry-After': '0'})),
+        stub_response(200, rate)])
+    assert time.time() - start < 5
+    assert 200 == resp.status_code
+    assert 2 == len(calls)
+    bucket = adapter.bucket('http://api.crossref.org/works')
+    assert 50 == bucket.rate
+    assert 50 == bucket.capacity
+
+def test_adapter_backoff():
+    "ThrottledAdapter - retries with backoff without Retry-After, up to retries"
+    adapter = ThrottledAdapter(retries = 2, backoff_factor = 0.01)
+    resp, calls = send_scripted(adapter, [stub_response(503, {}), stub_response(200,
+        {'X-Rate-Limit-Limit': '10', 'X-Rate-Limit-Interval': '2s'})])
+    assert 200 == resp.status_code
+    assert 2 == len(calls)
+    assert 5 == adapter.bucket('http://api.crossref.org/').rate
+    resp, calls = send_scripted(adapter, [stub_response(503, {})] * 3)
+    assert 503 == resp.status_code
+    assert 3 == len(calls)
+
+def test_adapter_no_retry():
+    "ThrottledAdapter - other errors aren't retried, no rate without headers"
+    adapter = ThrottledAdapter(retries = 3, backoff_factor = 0.01)
+    resp, calls = send_scripted(adapter, [stub_response(404, {})])
+    assert 404 == resp.status_code
+    assert 1 == len(calls)
+    assert None == adapter.bucket('http://api.crossref.org/').rate
+
+class RecordingSession(object):
+    "Stands in for a requests.Session, recording the headers sent"
+    def __init__(self, body):
+        self.body = body
+        self.headers = []
+
+    def get(self, url, headers = None, **kwargs):
+        self.headers.append(headers)
+        return stub_body(self.body)
+
+def stub_body(body):
+    resp = stub_response(200, {})
+    resp._content = body
+    resp.encoding = 'utf-8'
+    return resp
+
+def test_content_negotiation_api_key():
+    "content_negotiation - mailto in the User-Agent, api_key as the Plus token"
+    from habanero import cn
+    sess = RecordingSession(b'{"DOI": "10.1/a"}')
+    cn.content_negotiation(ids = '10.1/a', format = "citeproc-json", session = sess,
+        mailto = "name@example.com", api_key = "123456")
+    head = sess.headers[0]
+    assert head['User-Agent'].endswith("(mailto:name@example.com)")
+    assert "Bearer 123456" == head['Crossref-Plus-API-Token']
+
+def test_citation_count_api_key():
+    "citation_count - mailto in the User-Agent, api_key as the Plus token"
+    from habanero import counts
+    sess = RecordingSession(b'<crossref_result><query_result><body>'
+        b'<query status="resolved" fl_count="7"/></body></query_result></crossref_result>')
+    assert 7 == counts.citation_count(doi = '10.1/a', session = sess,
+        mailto = "name@example.com", api_key = "123456")
+    head = sess.headers[0]
+    assert head['User-Agent'].endswith("(mailto:name@example.com)")
+    assert "Bearer 123456" == head['Crossref-Plus-API-Token']
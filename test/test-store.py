@@ -0,0 +1,54 @@
+"""Tests for the compact work store"""
+from nose.tools import *
+from habanero import WorkStore, Works
+from habanero.response import Work
+
+items = [
+  {'DOI': '10.1/a', 'title': [u'Café'], 'container-title': ['J'], 'type': 'journal-article',
+   'issued': {'date-parts': [[2012, 3, 21]]}, 'member': '340', 'publisher': 'P',
+   'license': [{'URL': 'http://creativecommons.org/licenses/by/4.0/'}],
+   'author': [{'family': 'X'}], 'reference-count': 12},
+  {'DOI': '10.1/b', 'title': [], 'type': 'journal-article', 'publisher': 'P',
+   'issued': {'date-parts': [[2014]]}},
+]
+
+def test_store_records():
+    "WorkStore - records read back from the columns"
+    store = WorkStore(items)
+    assert 2 == len(store)
+    assert '10.1/a' == store[0].doi
+    assert u'Café' == store[0].title
+    assert None == store[1].title
+    assert 2012 == store[0].issued_year
+    assert None == store[1].issued_month
+    assert 'http://creativecommons.org/licenses/by/4.0/' == store[0].license
+    assert None == store[1].license
+    assert '10.1/b' == store[-1].doi
+    assert ['10.1/a', '10.1/b'] == [ z.doi for z in store ]
+
+def test_store_encoded():
+    "WorkStore - repeated strings stored once"
+    store = WorkStore(items)
+    assert ['P', 'P'] == store.column('publisher')
+    assert ['P'] == store._columns['publisher'].values
+    assert ['J', None] == store.column('container_title')
+    assert 0 < store.nbytes()
+
+def test_store_append():
+    "WorkStore - append dicts and Work records"
+    store = WorkStore()
+    store.append(Work(items[0]))
+    store.append(items[1])
+    assert 2 == len(store)
+    assert 'journal-article' == store[1].type
+    assert '340' == store[0].as_dict()['member']
+
+def test_works_to_store():
+    "Works - to_store"
+    store = Works({'message': {'items': items}}).to_store()
+    assert 2 == len(store)
+
+@raises(IndexError)
+def test_store_index_error():
+    "WorkStore - index out of range"
+    WorkStore(items)[2]
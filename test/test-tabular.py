@@ -0,0 +1,54 @@
+"""Tests for columnar output of works"""
+import os
+import tempfile
+import importlib
+from unittest import SkipTest
+from habanero import Works, write_parquet
+from habanero.tabular import flatten
+
+items = [
+  {'DOI': '10.1/a', 'title': ['A'], 'container-title': ['J'], 'type': 'journal-article',
+   'issued': {'date-parts': [[2012, 3, 21]]}, 'member': '340', 'publisher': 'P',
+   'author': [{'family': 'X'}, {'family': 'Y'}], 'reference-count': 12},
+  {'DOI': '10.1/b', 'title': [], 'issued': {'date-parts': [[2014]]}},
+]
+res = Works({'status': 'ok', 'message-type': 'work-list', 'message-version': '1.0.0',
+  'message': {'items': items}})
+
+def need(name):
+    "Skip a test when an optional dependency isn't installed"
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        raise SkipTest("needs " + name)
+
+def test_flatten():
+    "flatten - common fields, missing values None"
+    cols = flatten(items)
+    assert ['10.1/a', '10.1/b'] == cols['doi']
+    assert ['A', None] == cols['title']
+    assert [2012, 2014] == cols['issued_year']
+    assert [21, None] == cols['issued_day']
+    assert [2, None] == cols['author_count']
+
+def test_works_to_arrow():
+    "Works - to_arrow, typed columns"
+    need('pyarrow')
+    tbl = res.to_arrow()
+    assert 2 == tbl.num_rows
+    assert 'int32' == str(tbl.schema.field('reference_count').type)
+
+def test_works_to_pandas():
+    "Works - to_pandas"
+    need('pandas')
+    df = res.to_pandas()
+    assert ['10.1/a', '10.1/b'] == list(df['doi'])
+
+def test_write_parquet():
+    "write_parquet - batches of works"
+    need('pyarrow')
+    import pyarrow.parquet
+    path = os.path.join(tempfile.mkdtemp(), "works.parquet")
+    assert 4 == write_parquet(items * 2, path, batch_size = 3)
+    assert 2 == pyarrow.parquet.ParquetFile(path).num_row_groups
+    assert 2 == res.to_parquet(path)
@@ -25,6 +25,21 @@ def test_works_with_many_ids():
     assert 'work' == [ x['message-type'] for x in res ][0]
     assert dois[0] == res[0]['message']['DOI']
 
+def test_works_with_many_ids_concurrency():
+    "works - param: concurrency, results in input order"
+    dois = ['10.1016/j.neurobiolaging.2010.03.024', '10.1002/jor.1100150407',
+    '10.1038/srep16696', '10.1109/icdcsw.2003.1203662', '10.3892/ijo_00000353']
+    res = cr.works(ids = dois, concurrency = 3)
+    assert list == res.__class__
+    assert dois == [ x['message']['DOI'] for x in res ]
+
+def test_works_with_many_ids_as_completed():
+    "works - param: as_completed, yields (doi, result) tuples"
+    dois = ['10.1016/j.neurobiolaging.2010.03.024', '10.1002/jor.1100150407']
+    res = list(cr.works(ids = dois, concurrency = 2, as_completed = True))
+    assert 2 == len(res)
+    assert sorted(dois) == sorted([ x[0] for x in res ])
+
 # def test_works_doesnt_allow_cursor_with_ids_input():
 #     "works - param: ids, cursor not supported with DOIs"
 #     res1 = cr.works(ids = '10.1016/j.neurobiolaging.2010.03.024', cursor = "*")
@@ -68,3 +83,44 @@ def test_works_field_queries():
 def test_works_query_filters_not_allowed_with_dois():
     "works - param: kwargs - query filters not allowed on works/DOI/ route"
     cr.works(ids = '10.1371/journal.pone.0033693', query_author = 'carl boettiger')
+
+def test_works_select():
+    "works - param: select"
+    res = cr.works(query = "ecology", limit = 3, select = ['DOI', 'title'])
+    assert dict == res.__class__
+    for x in res['message']['items']:
+        assert set(x.keys()) <= set(['DOI', 'title'])
+
+@raises(ValueError)
+def test_works_select_unknown_field():
+    "works - param: select - unknown fields fail well"
+    cr.works(query = "ecology", select = ['DOI', 'titel'])
+
+@raises(ValueError)
+def test_works_select_not_allowed_with_dois():
+    "works - param: select - not allowed on works/DOI/ route"
+    cr.works(ids = '10.1371/journal.pone.0033693', select = ['DOI'])
+
+def test_works_batch():
+    "works_batch - results in input order, with not found DOIs"
+    dois = ['10.1371/journal.pone.0033693', '10.1038/srep16696', '10.9999/habanero.not.found']
+    res = cr.works_batch(dois, chunk_size = 2)
+    assert dict == res.__class__
+    assert 3 == len(res['items'])
+    assert dois[0] == res['items'][0]['DOI'].lower()
+    assert dois[1] == res['items'][1]['DOI'].lower()
+    assert None == res['items'][2]
+    assert [dois[2]] == res['not_found']
+
+def test_works_batch_select():
+    "works_batch - param: select, DOI always included"
+    dois = ['10.1371/journal.pone.0033693', '10.1038/srep16696']
+    res = cr.works_batch(dois, select = ['title'])
+    assert [] == res['not_found']
+    assert dois[1] == res['items'][1]['DOI'].lower()
+    assert 'title' in res['items'][0]
+
+def test_filter_handler_repeats_list_values():
+    "filter_handler - list values repeat the filter"
+    from habanero.filterhandler import filter_handler
+    assert "doi:10.1/a,doi:10.1/b" == filter_handler({'doi': ['10.1/a', '10.1/b']})